@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Eterspire API Data Generator - Scrape Checkpoint
+Compact, append-only binary replacement for all_gear_raw.json.
+
+    header:  b'ETRCKPT1' + codec byte (b'm' = MessagePack, b'j' = JSON)
+    records: 4-byte big-endian length + encoded record, one of
+        {'type': 'gear_set', 'file': filename, 'data': gear_data}
+        {'type': 'file_done', 'file': filename, 'size': ..., 'mtime_ns': ...,
+         'duplicates': names skipped as duplicates of another file's gear sets}
+        {'type': 'end'}
+
+Gear sets are appended as each HTML file is scraped, so the import stage can
+stream them back one record at a time, and an interrupted scrape can resume
+after the last completed file instead of starting over. MessagePack is used
+when installed, JSON records otherwise.
+"""
+
+import json
+import os
+import struct
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+CHECKPOINT_FILE = 'all_gear_raw.ckpt'
+
+MAGIC = b'ETRCKPT1'
+HEADER_SIZE = len(MAGIC) + 1
+_LENGTH = struct.Struct('>I')
+
+
+def _encoder(codec):
+    if codec == b'm':
+        return lambda record: msgpack.packb(record, use_bin_type=True)
+    return lambda record: json.dumps(record, separators=(',', ':')).encode('utf-8')
+
+
+def _decoder(codec):
+    if codec == b'm':
+        if msgpack is None:
+            raise RuntimeError("This checkpoint uses MessagePack; install it with: pip install msgpack")
+        return lambda payload: msgpack.unpackb(payload, raw=False)
+    return lambda payload: json.loads(payload.decode('utf-8'))
+
+
+def file_fingerprint(filename, folder='manual-download'):
+    """(size, mtime_ns) of a scraped HTML file, recorded to detect edits before resuming"""
+    stat = os.stat(os.path.join(folder, filename))
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _scan(path):
+    """Yield (end offset, record) for each complete record, stopping at a truncated tail"""
+    with open(path, 'rb') as f:
+        header = f.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE or header[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a gear checkpoint")
+        
+        decode = _decoder(header[len(MAGIC):])
+        while True:
+            prefix = f.read(_LENGTH.size)
+            if len(prefix) < _LENGTH.size:
+                return
+            length, = _LENGTH.unpack(prefix)
+            payload = f.read(length)
+            if len(payload) < length:
+                return
+            yield f.tell(), decode(payload)
+
+
+def read_records(path=CHECKPOINT_FILE):
+    """Stream every complete record in the checkpoint"""
+    for _, record in _scan(path):
+        yield record
+
+
+def read_gear_sets(path=CHECKPOINT_FILE, sources=None, duplicates=None):
+    """Stream the gear sets in the checkpoint, one at a time
+    
+    If dicts are passed as `sources` and `duplicates`, they are filled with
+    filename -> gear set names, as scraper.scrape_all_files does.
+    """
+    for record in read_records(path):
+        if record['type'] == 'gear_set':
+            if sources is not None:
+                sources.setdefault(record['file'], []).append(record['data']['name'])
+            yield record['data']
+        elif record['type'] == 'file_done':
+            if sources is not None:
+                sources.setdefault(record['file'], [])
+            if duplicates is not None:
+                duplicates[record['file']] = record.get('duplicates', [])
+
+
+def is_complete(path=CHECKPOINT_FILE):
+    """True if the checkpoint exists and was closed after a full scrape"""
+    if not os.path.exists(path):
+        return False
+    try:
+        return any(record['type'] == 'end' for record in read_records(path))
+    except ValueError:
+        return False
+
+
+class CheckpointWriter:
+    """Appends scraped gear sets to a checkpoint, optionally resuming an interrupted one
+    
+    With `resume`, an existing incomplete checkpoint is truncated back to its
+    last completed file and reopened for appending, as long as none of the
+    completed files changed on disk since. `completed_files`, `seen_names` and
+    `gear_set_count` then describe what was already scraped.
+    """
+    
+    def __init__(self, path=CHECKPOINT_FILE, resume=False):
+        self.path = path
+        self.completed_files = set()
+        self.seen_names = set()
+        self.gear_set_count = 0
+        
+        if resume and self._load_resumable():
+            self._file = open(path, 'r+b')
+            self._file.seek(self._resume_offset)
+            self._file.truncate()
+            self._encode = _encoder(self._codec)
+            return
+        
+        self.completed_files = set()
+        self.seen_names = set()
+        self.gear_set_count = 0
+        self._codec = b'm' if msgpack is not None else b'j'
+        self._encode = _encoder(self._codec)
+        self._file = open(path, 'wb')
+        self._file.write(MAGIC + self._codec)
+    
+    @property
+    def resumed(self):
+        return bool(self.completed_files)
+    
+    def _load_resumable(self):
+        """Read an incomplete checkpoint up to its last completed file; False if it can't be resumed"""
+        if not os.path.exists(self.path):
+            return False
+        
+        try:
+            with open(self.path, 'rb') as f:
+                header = f.read(HEADER_SIZE)
+            self._codec = header[len(MAGIC):]
+            _decoder(self._codec)
+            
+            offset = HEADER_SIZE
+            pending_names = []
+            for end, record in _scan(self.path):
+                if record['type'] == 'end':
+                    return False
+                if record['type'] == 'gear_set':
+                    pending_names.append(record['data']['name'])
+                elif record['type'] == 'file_done':
+                    if file_fingerprint(record['file']) != (record['size'], record['mtime_ns']):
+                        print(f"  {record['file']} changed since the interrupted run, starting over")
+                        return False
+                    self.completed_files.add(record['file'])
+                    self.seen_names.update(pending_names)
+                    self.gear_set_count += len(pending_names)
+                    pending_names = []
+                    offset = end
+        except (OSError, ValueError, RuntimeError):
+            return False
+        
+        self._resume_offset = offset
+        return bool(self.completed_files)
+    
+    def _append(self, record):
+        payload = self._encode(record)
+        self._file.write(_LENGTH.pack(len(payload)) + payload)
+    
+    def add_file(self, filename, gear_sets, duplicates=()):
+        """Append all gear sets kept from one HTML file and mark the file complete"""
+        for gear_data in gear_sets:
+            self._append({'type': 'gear_set', 'file': filename, 'data': gear_data})
+            self.seen_names.add(gear_data['name'])
+            self.gear_set_count += 1
+        
+        size, mtime_ns = file_fingerprint(filename)
+        self._append({'type': 'file_done', 'file': filename, 'size': size, 'mtime_ns': mtime_ns,
+                      'duplicates': list(duplicates)})
+        self.completed_files.add(filename)
+        
+        # A file's records only count once they reach the OS, so an interrupt can resume here
+        self._file.flush()
+    
+    def close(self, complete=True):
+        """Close the checkpoint, marking it complete unless the scrape was interrupted"""
+        if complete:
+            self._append({'type': 'end'})
+        self._file.close()
+
+
+if __name__ == "__main__":
+    import sys
+    
+    # python checkpoint.py [output.json]: dump the checkpoint as all_gear_raw.json-style JSON
+    output = sys.argv[1] if len(sys.argv) > 1 else 'all_gear_raw.json'
+    all_data = list(read_gear_sets())
+    with open(output, 'w') as f:
+        json.dump(all_data, f, indent=2)
+    print(f"Wrote {len(all_data)} gear sets to {output}")
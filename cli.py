@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Eterspire API Data Generator - Command Line Interface
+One entry point for every pipeline step. Heavy modules (BeautifulSoup, watchdog,
+the pipeline stages) are only imported by the subcommand that needs them, so
+`--help` and export-only runs start fast. scrape/import/export run a single
+stage, skipped when its inputs are unchanged (see stages.py); pass --force to rerun.
+
+    python cli.py run       # full pipeline (same as main.py)
+    python cli.py scrape    # manual-download/*.html -> all_gear_raw.ckpt
+    python cli.py import    # all_gear_raw.ckpt -> eterspire.db
+    python cli.py export    # eterspire.db -> output/*.json
+    python cli.py serve     # serve output/*.json over HTTP
+    python cli.py watch     # auto-rebuild on changes (see watch.py)
+    python cli.py bench     # measure CLI cold-start time
+"""
+
+import argparse
+import sys
+
+# Cold start budget for `cli.py --help`, checked by `cli.py bench`
+DEFAULT_TARGET_MS = 150
+
+
+def cmd_run(args):
+    """Run the complete pipeline"""
+    from main import main
+    return main(force=args.force, concurrent=args.concurrent)
+
+
+def cmd_stage(args):
+    """Run a single pipeline stage (scrape, import or export), skipped when up to date"""
+    from stages import run_stages, print_summary
+    
+    exit_code, results = run_stages([args.command], force=args.force)
+    print_summary(results)
+    return exit_code
+
+
+def cmd_serve(args):
+    """Serve the output folder over HTTP"""
+    import functools
+    import os
+    from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+    
+    if not os.path.isdir('output'):
+        print("\n❌ ERROR: 'output' folder not found, run the pipeline first")
+        return 1
+    
+    handler = functools.partial(SimpleHTTPRequestHandler, directory='output')
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    print(f"🌐 Serving output/ on http://{args.host}:{args.port}/ (Press Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⚠️  Stopping server...")
+    finally:
+        server.server_close()
+    return 0
+
+
+def cmd_watch(args):
+    """Watch manual-download and rebuild on changes"""
+    from watch import watch_manual_download
+    watch_manual_download(daemon=args.daemon, socket_path=args.socket, poll_interval=args.poll)
+    return 0
+
+
+def parse_importtime(stderr):
+    """Parse `python -X importtime` output into [(cumulative_us, module)] for top-level imports"""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        
+        _, cumulative_us, module = line.split('|')
+        # Nested imports are indented under the module that triggered them
+        if module.startswith('  '):
+            continue
+        imports.append((int(cumulative_us), module.strip()))
+    return imports
+
+
+def cmd_bench(args):
+    """Measure cold-start latency of the CLI, like `python -X importtime`"""
+    import os
+    import statistics
+    import subprocess
+    import time
+    
+    command = [sys.executable, '-X', 'importtime', os.path.abspath(__file__)] + (args.bench_args or ['--help'])
+    label = ' '.join(args.bench_args or ['--help'])
+    
+    wall_ms = []
+    imports = []
+    for _ in range(args.runs):
+        started = time.perf_counter()
+        result = subprocess.run(command, capture_output=True, text=True)
+        wall_ms.append((time.perf_counter() - started) * 1000)
+        
+        # Timing a command that failed (e.g. an argparse error) would be meaningless
+        if result.returncode != 0:
+            errors = [line for line in result.stderr.splitlines() if not line.startswith('import time:')]
+            print(f"❌ cli.py {label} exited with code {result.returncode}")
+            for line in errors[-20:]:
+                print(f"   {line}")
+            return 1
+        imports = parse_importtime(result.stderr)
+    
+    median_ms = statistics.median(wall_ms)
+    import_ms = sum(cumulative for cumulative, _ in imports) / 1000
+    
+    print(f"⏱️  cli.py {label}: {args.runs} cold start(s)")
+    print(f"   Wall time: median {median_ms:.1f} ms | min {min(wall_ms):.1f} ms | max {max(wall_ms):.1f} ms")
+    print(f"   Import time: {import_ms:.1f} ms across {len(imports)} top-level module(s)")
+    
+    print("\n   Slowest imports:")
+    for cumulative, module in sorted(imports, reverse=True)[:args.top]:
+        print(f"   {cumulative / 1000:8.1f} ms  {module}")
+    
+    heavy = [module for _, module in imports if module in ('bs4', 'watchdog', 'scraper', 'sqlite3')]
+    if heavy and not args.bench_args:
+        print(f"\n⚠️  Heavy modules imported at startup: {', '.join(heavy)}")
+    
+    if median_ms > args.target_ms:
+        print(f"\n❌ Median cold start {median_ms:.1f} ms exceeds target {args.target_ms} ms")
+        return 1
+    
+    print(f"\n✅ Median cold start within target ({args.target_ms} ms)")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='cli.py',
+        description="Eterspire API data generator: wiki HTML -> SQLite -> API-ready JSON"
+    )
+    subparsers = parser.add_subparsers(dest='command', metavar='COMMAND')
+    
+    run = subparsers.add_parser('run', help="run the complete pipeline")
+    run.add_argument('--concurrent', action='store_true',
+                     help="overlap scraping, import and export (bypasses the stage cache)")
+    run.set_defaults(func=cmd_run)
+    
+    scrape = subparsers.add_parser('scrape', help="scrape manual-download/*.html into all_gear_raw.ckpt")
+    scrape.set_defaults(func=cmd_stage)
+    
+    load = subparsers.add_parser('import', help="load all_gear_raw.ckpt into eterspire.db")
+    load.set_defaults(func=cmd_stage)
+    
+    export = subparsers.add_parser('export', help="export eterspire.db to output/*.json")
+    export.set_defaults(func=cmd_stage)
+    
+    for stage_parser in (run, scrape, load, export):
+        stage_parser.add_argument('--force', action='store_true',
+                                  help="run even if inputs and code are unchanged since the last run")
+    
+    serve = subparsers.add_parser('serve', help="serve output/*.json over HTTP")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8000)
+    serve.set_defaults(func=cmd_serve)
+    
+    watch = subparsers.add_parser('watch', help="rebuild automatically when manual-download changes")
+    watch.add_argument('--daemon', action='store_true',
+                       help="keep parsed data, DB connection and export views resident between events")
+    watch.add_argument('--socket', metavar='PATH',
+                       help="with --daemon, stream updates as JSON lines on this Unix socket")
+    watch.add_argument('--poll', metavar='SECONDS', type=float, nargs='?', const=1.0,
+                       help="poll the folder instead of using native notifications, default every 1s")
+    watch.set_defaults(func=cmd_watch)
+    
+    bench = subparsers.add_parser('bench', help="measure CLI cold-start time (-X importtime)")
+    bench.add_argument('--runs', type=int, default=5, help="number of cold starts to time (default: 5)")
+    bench.add_argument('--target-ms', type=float, default=DEFAULT_TARGET_MS,
+                       help=f"fail if the median cold start exceeds this (default: {DEFAULT_TARGET_MS})")
+    bench.add_argument('--top', type=int, default=10, help="number of slowest imports to list")
+    bench.add_argument('bench_args', nargs=argparse.REMAINDER, metavar='ARGS',
+                       help="CLI arguments to benchmark (default: --help)")
+    bench.set_defaults(func=cmd_bench)
+    
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    
+    if not hasattr(args, 'func'):
+        parser.print_help()
+        return 0
+    
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print("\n\n⚠️  Interrupted by user")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n\n❌ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Eterspire API Data Generator - Concurrent Pipeline
+Overlaps scraping, database import and export instead of running them back to back:
+
+    main thread  - parses each HTML file and queues its gear sets
+    db-writer    - inserts and commits each gear set, then builds its export view
+    io-writer    - appends each file's gear sets to all_gear_raw.ckpt, writes output/*.json
+
+Queues are bounded so a slow consumer throttles the producer. Gear sets are
+inserted by a single writer in scrape order, so the output is identical to
+the sequential pipeline. The whole import is one transaction, committed only
+once every set is in: readers keep seeing the previous import until then, and
+a failed or interrupted run leaves it untouched. The first error in any
+thread stops the others and is re-raised to the caller.
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+from stages import CHECKPOINT_FILE, DB_FILE
+
+QUEUE_SIZE = 8
+
+_DONE = object()
+
+
+class _Worker(threading.Thread):
+    """Consumes a queue until _DONE, timing the work and recording the first error"""
+    
+    def __init__(self, name, handle, failed):
+        super().__init__(name=name, daemon=True)
+        self.queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self.handle = handle
+        self.failed = failed
+        self.error = None
+        self.busy_seconds = 0.0
+    
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item is _DONE:
+                return
+            
+            # After any failure, keep draining so producers never block on a full queue
+            if self.failed.is_set():
+                continue
+            
+            started = time.perf_counter()
+            try:
+                self.handle(item)
+            except BaseException as e:
+                self.error = e
+                self.failed.set()
+            self.busy_seconds += time.perf_counter() - started
+    
+    def put(self, item):
+        """Queue an item, unless the pipeline has already failed"""
+        if not self.failed.is_set():
+            self.queue.put(item)
+    
+    def finish(self):
+        """Signal end of input and wait for the queue to drain"""
+        self.queue.put(_DONE)
+        self.join()
+
+
+def run_concurrent():
+    """Run scrape, import and export as an overlapped producer/consumer pipeline"""
+    from scraper import iter_scraped_files
+    from checkpoint import CheckpointWriter
+    from database import (
+        connect_tuned, init_database, clear_database, insert_all_gear_data, set_source_files, commit_changes
+    )
+    from exporter import build_gear_set_view, write_exports
+    
+    started = time.perf_counter()
+    failed = threading.Event()
+    
+    conn = connect_tuned(DB_FILE)
+    init_database(conn)
+    cursor = conn.cursor()
+    cursor.row_factory = sqlite3.Row
+    
+    all_gear = []
+    all_items = []
+    
+    def import_gear_set(gear_data):
+        # Only clear the previous import once there is something to replace it with
+        if not all_gear:
+            clear_database(conn, commit=False)
+        
+        insert_all_gear_data([gear_data], conn, commit=False)
+        
+        # Build this set's export view from the not yet committed rows
+        cursor.execute('SELECT * FROM gear_sets WHERE name = ?', (gear_data['name'],))
+        gear_item, items = build_gear_set_view(cursor, cursor.fetchone())
+        all_gear.append(gear_item)
+        all_items.extend(items)
+    
+    db_writer = _Worker('db-writer', import_gear_set, failed)
+    io_writer = _Worker('io-writer', lambda write: write(), failed)
+    db_writer.start()
+    io_writer.start()
+    
+    all_data = []
+    sources = {}
+    duplicates = {}
+    scrape_seconds = 0.0
+    checkpoint = CheckpointWriter(CHECKPOINT_FILE)
+    committed = False
+    try:
+        try:
+            scrape_started = time.perf_counter()
+            for filename, gear_sets in iter_scraped_files(sources, duplicates=duplicates):
+                if failed.is_set():
+                    break
+                # Checkpoint each file as soon as it is parsed, off the scraping thread
+                io_writer.put(lambda filename=filename, gear_sets=gear_sets:
+                              checkpoint.add_file(filename, gear_sets, duplicates[filename]))
+                for gear_data in gear_sets:
+                    all_data.append(gear_data)
+                    db_writer.put(gear_data)
+            scrape_seconds = time.perf_counter() - scrape_started
+        finally:
+            db_writer.finish()
+        
+        if all_data and not failed.is_set():
+            set_source_files(sources, conn, duplicates, commit=False)
+            commit_changes(conn)
+            committed = True
+            io_writer.put(lambda: write_exports(all_gear, all_items))
+    finally:
+        if not committed:
+            # Failed or interrupted: keep the previous import
+            conn.rollback()
+        io_writer.finish()
+        checkpoint.close(complete=bool(all_data) and not failed.is_set())
+        conn.close()
+    
+    for worker in (db_writer, io_writer):
+        if worker.error is not None:
+            raise worker.error
+    
+    if not all_data:
+        print("\n❌ ERROR: No data was scraped!")
+        return 1
+    
+    wall_seconds = time.perf_counter() - started
+    stage_seconds = scrape_seconds + db_writer.busy_seconds + io_writer.busy_seconds
+    
+    print("\n⏱️  Concurrent stages:")
+    print(f"   scrape     {scrape_seconds:6.2f}s")
+    print(f"   db-writer  {db_writer.busy_seconds:6.2f}s busy")
+    print(f"   io-writer  {io_writer.busy_seconds:6.2f}s busy")
+    print(f"   Wall clock {wall_seconds:6.2f}s (sequential sum {stage_seconds:.2f}s)")
+    return 0
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Eterspire API Data Generator - Warm-State Daemon
+Keeps the parsed gear sets, an open database connection and the export views
+in memory between watcher events, so each change only recomputes what it touched.
+"""
+
+import json
+import os
+import queue
+import socket
+import sqlite3
+import threading
+from scraper import scrape_all_files, scrape_changed_files
+from database import (
+    connect_tuned, init_database, replace_all_gear_data, replace_gear_sets, set_source_files
+)
+from exporter import build_gear_set_view, write_exports
+
+
+class WarmState:
+    """Resident pipeline state that applies file changes incrementally"""
+    
+    def __init__(self, db_path='eterspire.db'):
+        self.db_path = db_path
+        self.conn = None
+        self.sources = {}      # filename -> gear set names scraped from it
+        self.duplicates = {}   # filename -> gear set names it skipped as duplicates
+        self.gear_sets = {}    # gear set name -> raw scraped data
+        self.views = {}        # gear set name -> (gear_item, items)
+        self.order = []        # gear set names in database id order
+        self.generation = 0
+        self._written = {}     # output path -> content last written
+        self._subscribers = []
+        self._lock = threading.Lock()
+    
+    def subscribe(self, callback):
+        """Register a callable that receives every update published by this state
+        
+        Callbacks run while the state is locked, so updates arrive in order; they
+        must return quickly (e.g. only queue the update) and must not call back
+        into the state.
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+    
+    def with_snapshot(self, callback):
+        """Call callback with a snapshot message of the current state
+        
+        No update is published until the callback returns, so a subscriber
+        registered from it sees every change after the snapshot. The callback
+        runs under the state lock and must not block on I/O.
+        """
+        with self._lock:
+            callback(self._make_update('snapshot', list(self.order), []))
+    
+    def gear_sets_view(self):
+        """Current hierarchical gear sets, as exported to output/gear_sets.json"""
+        with self._lock:
+            return [self.views[name][0] for name in self.order]
+    
+    def items_view(self):
+        """Current flat item list, as exported to output/items.json"""
+        with self._lock:
+            return [item for name in self.order for item in self.views[name][1]]
+    
+    def load(self):
+        """Cold start: scrape everything, rebuild the database and all views"""
+        if self.conn is None:
+            self.conn = connect_tuned(self.db_path)
+        
+        with self._lock:
+            sources = {}
+            duplicates = {}
+            all_data = scrape_all_files(sources, duplicates)
+            
+            init_database(self.conn)
+            replace_all_gear_data(all_data, sources, duplicates, self.conn)
+            
+            self.sources = sources
+            self.duplicates = duplicates
+            self.gear_sets = {gear_data['name']: gear_data for gear_data in all_data}
+            self.views = {}
+            self._rebuild_views(self.gear_sets)
+            self._write_outputs()
+            self.generation += 1
+            update = self._make_update('snapshot', list(self.order), [])
+            self._publish(update)
+        
+        return update
+    
+    def apply_changes(self, changed_files):
+        """Re-scrape the changed files and recompute only the gear sets they contribute"""
+        if self.conn is None:
+            return self.load()
+        
+        with self._lock:
+            updated_sets, removed_names, new_sources, new_duplicates = scrape_changed_files(
+                changed_files, self.sources, self.duplicates
+            )
+            
+            if not updated_sets and not removed_names:
+                # Still record which duplicates the changed files contain now
+                self._record_sources(new_sources, new_duplicates)
+                print("\nNo gear sets affected, outputs are up to date")
+                return None
+            
+            replace_gear_sets(updated_sets, removed_names, self.conn)
+            self._record_sources(new_sources, new_duplicates)
+            
+            for name in removed_names:
+                self.gear_sets.pop(name, None)
+                self.views.pop(name, None)
+            
+            changed = {gear_data['name']: gear_data for gear_data in updated_sets}
+            self.gear_sets.update(changed)
+            self._rebuild_views(changed)
+            self._write_outputs()
+            self.generation += 1
+            update = self._make_update('update', sorted(changed), sorted(removed_names))
+            self._publish(update)
+        
+        return update
+    
+    def close(self):
+        """Close the resident database connection"""
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+    
+    def _record_sources(self, new_sources, new_duplicates):
+        """Store the re-scraped files' gear set names in the database and in memory"""
+        set_source_files(new_sources, self.conn, new_duplicates)
+        
+        for file_map, new_file_map in ((self.sources, new_sources), (self.duplicates, new_duplicates)):
+            for filename, names in new_file_map.items():
+                if names:
+                    file_map[filename] = names
+                else:
+                    file_map.pop(filename, None)
+    
+    def _rebuild_views(self, names):
+        """Rebuild export views for the given gear sets from the resident connection"""
+        cursor = self.conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        
+        cursor.execute('SELECT * FROM gear_sets ORDER BY id')
+        gear_set_rows = cursor.fetchall()
+        
+        self.order = [row['name'] for row in gear_set_rows]
+        for row in gear_set_rows:
+            if row['name'] in names or row['name'] not in self.views:
+                self.views[row['name']] = build_gear_set_view(cursor, row)
+    
+    def _write_outputs(self):
+        """Write the export files, skipping any whose content did not change"""
+        all_gear = [self.views[name][0] for name in self.order]
+        all_items = [item for name in self.order for item in self.views[name][1]]
+        write_exports(all_gear, all_items, cache=self._written)
+    
+    def _make_update(self, kind, updated_names, removed_names):
+        """Build the message sent to subscribers for a snapshot or an update"""
+        return {
+            'event': kind,
+            'generation': self.generation,
+            'updated': updated_names,
+            'removed': removed_names,
+            'gear_sets': [self.views[name][0] for name in updated_names],
+            'items': [item for name in updated_names for item in self.views[name][1]],
+        }
+    
+    def _publish(self, update):
+        """Send an update to every subscriber, isolating subscriber failures"""
+        for callback in list(self._subscribers):
+            try:
+                callback(update)
+            except Exception as e:
+                print(f"\n⚠️  Subscriber error: {e}")
+
+
+def _encode_message(message):
+    return (json.dumps(message, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+class _SocketSubscriber(threading.Thread):
+    """One connected client, fed from a bounded queue by its own writer thread
+    
+    Publishing only queues messages, so a slow or stuck client never blocks
+    the pipeline; a client that lets its queue fill up, or doesn't accept a
+    message within SEND_TIMEOUT seconds, is disconnected.
+    """
+    
+    QUEUE_SIZE = 64
+    SEND_TIMEOUT = 5
+    
+    def __init__(self, sock):
+        super().__init__(name='socket-subscriber', daemon=True)
+        self.sock = sock
+        self.sock.settimeout(self.SEND_TIMEOUT)
+        self.queue = queue.Queue(maxsize=self.QUEUE_SIZE)
+        self.connected = True
+    
+    def offer(self, message):
+        """Queue a message without blocking; returns False once the client is dropped"""
+        if not self.connected:
+            return False
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except queue.Full:
+            print("\n⚠️  Dropping a socket subscriber that fell behind")
+            self.disconnect()
+            return False
+    
+    def disconnect(self):
+        """Stop sending; the writer thread closes the socket"""
+        self.connected = False
+        try:
+            # Unblocks a sendall in progress
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        try:
+            self.queue.put_nowait(None)
+        except queue.Full:
+            pass
+    
+    def run(self):
+        try:
+            while self.connected:
+                message = self.queue.get()
+                if message is None or not self.connected:
+                    break
+                self.sock.sendall(_encode_message(message))
+        except OSError:
+            pass
+        finally:
+            self.connected = False
+            self.sock.close()
+
+
+class UnixSocketPublisher:
+    """Streams WarmState updates to local clients over a Unix socket
+    
+    Each message is one JSON object per line, as built by WarmState. A client
+    receives a full snapshot (event 'snapshot') when it connects, then every
+    subsequent update (event 'update', or 'snapshot' after a reload). Clients
+    that can't keep up are disconnected (see _SocketSubscriber).
+    """
+    
+    def __init__(self, state, path):
+        if not hasattr(socket, 'AF_UNIX'):
+            raise RuntimeError("Unix sockets are not supported on this platform")
+        
+        self.state = state
+        self.path = path
+        self._clients = []
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+    
+    def start(self):
+        """Bind the socket and start accepting subscribers"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(self.path)
+        self._server.listen()
+        
+        self.state.subscribe(self.publish)
+        self._thread = threading.Thread(target=self._accept_loop, name='socket-publisher', daemon=True)
+        self._thread.start()
+    
+    def publish(self, update):
+        """Queue an update for every connected client, forgetting any that were dropped"""
+        with self._lock:
+            self._clients = [client for client in self._clients if client.offer(update)]
+    
+    def stop(self):
+        """Close the socket and all client connections"""
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        
+        with self._lock:
+            for client in self._clients:
+                client.disconnect()
+            self._clients = []
+        
+        if os.path.exists(self.path):
+            os.remove(self.path)
+    
+    def _accept_loop(self):
+        """Accept clients and greet each one with a snapshot"""
+        while self._server is not None:
+            try:
+                sock, _ = self._server.accept()
+            except OSError:
+                return
+            
+            client = _SocketSubscriber(sock)
+            
+            def register(snapshot, client=client):
+                client.offer(snapshot)
+                with self._lock:
+                    self._clients.append(client)
+            
+            # The snapshot is queued ahead of any later update; it is sent by the client's thread
+            self.state.with_snapshot(register)
+            client.start()
@@ -1,11 +1,30 @@
 import sqlite3
 import json
+import os
 
-def init_database():
+def connect_tuned(path='eterspire.db'):
+    """Open a long-lived connection tuned for repeated small write transactions
+    
+    Used by the watch daemon, which keeps one connection open between rebuilds.
+    The functions below accept it via `conn` and open their own when omitted.
+    """
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    conn.execute('PRAGMA cache_size=-16000')
+    return conn
+
+def init_database(conn=None):
     """Create SQLite database and tables"""
-    conn = sqlite3.connect('eterspire.db')
+    own_conn = conn is None
+    if own_conn:
+        conn = sqlite3.connect('eterspire.db')
     cursor = conn.cursor()
     
+    # WAL is persistent in the file: readers (query.py) never block the pipeline's commits
+    cursor.execute('PRAGMA journal_mode=WAL')
+    
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS gear_sets (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -54,23 +73,148 @@ def init_database():
         )
     ''')
     
+    # Import generation, bumped on every write so readers (query.py) can invalidate caches
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pipeline_meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        )
+    ''')
+    
+    # Which HTML file each gear set was scraped from (used for incremental rebuilds)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS source_files (
+            filename TEXT NOT NULL,
+            gear_set_name TEXT NOT NULL,
+            PRIMARY KEY (filename, gear_set_name)
+        )
+    ''')
+    
+    # Gear sets a file also contains but that were skipped as duplicates of
+    # another file's, so they can be picked up again if that file drops them
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS duplicate_sources (
+            filename TEXT NOT NULL,
+            gear_set_name TEXT NOT NULL,
+            PRIMARY KEY (filename, gear_set_name)
+        )
+    ''')
+    
     conn.commit()
-    conn.close()
+    if own_conn:
+        conn.close()
 
-def clear_database():
-    """Clear all data from database"""
-    conn = sqlite3.connect('eterspire.db')
+def clear_database(conn=None, commit=True):
+    """Clear all data from database
+    
+    With commit=False the deletes stay in the caller's open transaction, to be
+    committed with commit_changes() (the write helpers below work the same way).
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = sqlite3.connect('eterspire.db')
     cursor = conn.cursor()
     cursor.execute('DELETE FROM weapons')
     cursor.execute('DELETE FROM armor')
     cursor.execute('DELETE FROM bonus_stats')
     cursor.execute('DELETE FROM gear_sets')
+    cursor.execute('DELETE FROM source_files')
+    cursor.execute('DELETE FROM duplicate_sources')
+    if commit:
+        commit_changes(conn)
+    if own_conn:
+        conn.close()
+
+def commit_changes(conn):
+    """Bump the import generation and commit the current write transaction"""
+    _bump_generation(conn.cursor())
     conn.commit()
-    conn.close()
 
-def insert_all_gear_data(all_gear_data):
+def _bump_generation(cursor):
+    """Increment the import generation as part of the current write transaction"""
+    cursor.execute('''
+        INSERT INTO pipeline_meta (key, value) VALUES ('generation', 1)
+        ON CONFLICT(key) DO UPDATE SET value = value + 1
+    ''')
+
+def get_generation(conn=None):
+    """Return the current import generation (0 if nothing was imported yet)"""
+    own_conn = conn is None
+    if own_conn:
+        conn = sqlite3.connect('eterspire.db')
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("SELECT value FROM pipeline_meta WHERE key = 'generation'")
+        row = cursor.fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    
+    if own_conn:
+        conn.close()
+    return row[0] if row else 0
+
+def _insert_gear_set_details(cursor, gear_set_id, gear_data):
+    """Insert bonus stats, armor and weapons rows for one gear set"""
+    # Insert bonus stats
+    for quality in ['normal', 'excellent']:
+        for category in ['armor', 'weapon']:
+            stats = gear_data.get('bonus_stats', {}).get(quality, {}).get(category, {})
+            if stats:
+                cursor.execute('''
+                    INSERT INTO bonus_stats (
+                        gear_set_id, quality, category,
+                        attack_speed_values, strength_values, vitality_values
+                    ) VALUES (?, ?, ?, ?, ?, ?)
+                ''', (
+                    gear_set_id, quality, category,
+                    json.dumps(stats.get('bonus_attack_speed')),
+                    json.dumps(stats.get('strength')),
+                    json.dumps(stats.get('vitality'))
+                ))
+    
+    # Insert armor pieces
+    for armor_piece in gear_data.get('armor', []):
+        cursor.execute('''
+            INSERT INTO armor (
+                gear_set_id, slot, quality, classes, item_name, hp_values
+            ) VALUES (?, ?, ?, ?, ?, ?)
+        ''', (
+            gear_set_id,
+            armor_piece['slot'],
+            armor_piece['quality'],
+            ','.join(armor_piece['classes']),
+            armor_piece['item_name'],
+            json.dumps(armor_piece.get('hp'))
+        ))
+    
+    # Insert weapons
+    for weapon in gear_data.get('weapons', []):
+        cursor.execute('''
+            INSERT INTO weapons (
+                gear_set_id, class, weapon_type, quality,
+                damage_values, attack_speed
+            ) VALUES (?, ?, ?, ?, ?, ?)
+        ''', (
+            gear_set_id,
+            weapon['class'],
+            weapon['weapon_type'],
+            weapon['quality'],
+            json.dumps(weapon.get('damage')),
+            weapon.get('attack_speed')
+        ))
+
+def _delete_gear_set_details(cursor, gear_set_id):
+    """Delete bonus stats, armor and weapons rows for one gear set"""
+    cursor.execute('DELETE FROM weapons WHERE gear_set_id = ?', (gear_set_id,))
+    cursor.execute('DELETE FROM armor WHERE gear_set_id = ?', (gear_set_id,))
+    cursor.execute('DELETE FROM bonus_stats WHERE gear_set_id = ?', (gear_set_id,))
+
+def insert_all_gear_data(all_gear_data, conn=None, commit=True):
     """Insert all scraped gear data into database"""
-    conn = sqlite3.connect('eterspire.db')
+    own_conn = conn is None
+    if own_conn:
+        conn = sqlite3.connect('eterspire.db')
     cursor = conn.cursor()
     
     for gear_data in all_gear_data:
@@ -84,67 +228,154 @@ def insert_all_gear_data(all_gear_data):
             cursor.execute('SELECT id FROM gear_sets WHERE name = ?', (gear_data['name'],))
             gear_set_id = cursor.fetchone()[0]
         
-        # Insert bonus stats
-        for quality in ['normal', 'excellent']:
-            for category in ['armor', 'weapon']:
-                stats = gear_data.get('bonus_stats', {}).get(quality, {}).get(category, {})
-                if stats:
-                    cursor.execute('''
-                        INSERT INTO bonus_stats (
-                            gear_set_id, quality, category,
-                            attack_speed_values, strength_values, vitality_values
-                        ) VALUES (?, ?, ?, ?, ?, ?)
-                    ''', (
-                        gear_set_id, quality, category,
-                        json.dumps(stats.get('bonus_attack_speed')),
-                        json.dumps(stats.get('strength')),
-                        json.dumps(stats.get('vitality'))
-                    ))
+        _insert_gear_set_details(cursor, gear_set_id, gear_data)
         
-        # Insert armor pieces
-        for armor_piece in gear_data.get('armor', []):
-            cursor.execute('''
-                INSERT INTO armor (
-                    gear_set_id, slot, quality, classes, item_name, hp_values
-                ) VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                gear_set_id,
-                armor_piece['slot'],
-                armor_piece['quality'],
-                ','.join(armor_piece['classes']),
-                armor_piece['item_name'],
-                json.dumps(armor_piece.get('hp'))
-            ))
+        print(f"  Inserted {gear_data['name']} (Tier {gear_data['tier']}) - Armor: {len(gear_data.get('armor', []))} slots, Weapons: {len(gear_data.get('weapons', []))}")
+    
+    if commit:
+        commit_changes(conn)
+    if own_conn:
+        conn.close()
+
+def replace_gear_sets(gear_sets, removed_names=(), conn=None):
+    """Patch the given gear sets in place and delete removed ones, in a single transaction
+    
+    Existing gear sets keep their id (and therefore their export order); only their
+    bonus stats, armor and weapons rows are rewritten.
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = sqlite3.connect('eterspire.db')
+    cursor = conn.cursor()
+    
+    for name in removed_names:
+        cursor.execute('SELECT id FROM gear_sets WHERE name = ?', (name,))
+        row = cursor.fetchone()
+        if row:
+            _delete_gear_set_details(cursor, row[0])
+            cursor.execute('DELETE FROM gear_sets WHERE id = ?', (row[0],))
+            print(f"  Removed {name}")
+    
+    for gear_data in gear_sets:
+        cursor.execute('SELECT id FROM gear_sets WHERE name = ?', (gear_data['name'],))
+        row = cursor.fetchone()
         
-        # Insert weapons
-        for weapon in gear_data.get('weapons', []):
-            cursor.execute('''
-                INSERT INTO weapons (
-                    gear_set_id, class, weapon_type, quality,
-                    damage_values, attack_speed
-                ) VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                gear_set_id,
-                weapon['class'],
-                weapon['weapon_type'],
-                weapon['quality'],
-                json.dumps(weapon.get('damage')),
-                weapon.get('attack_speed')
-            ))
+        if row:
+            gear_set_id = row[0]
+            cursor.execute(
+                'UPDATE gear_sets SET tier = ?, level = ? WHERE id = ?',
+                (gear_data['tier'], gear_data.get('level'), gear_set_id)
+            )
+            _delete_gear_set_details(cursor, gear_set_id)
+        else:
+            cursor.execute(
+                'INSERT INTO gear_sets (name, tier, level) VALUES (?, ?, ?)',
+                (gear_data['name'], gear_data['tier'], gear_data.get('level'))
+            )
+            gear_set_id = cursor.lastrowid
         
-        print(f"  Inserted {gear_data['name']} (Tier {gear_data['tier']}) - Armor: {len(gear_data.get('armor', []))} slots, Weapons: {len(gear_data.get('weapons', []))}")
+        _insert_gear_set_details(cursor, gear_set_id, gear_data)
+        
+        print(f"  Updated {gear_data['name']} (Tier {gear_data['tier']}) - Armor: {len(gear_data.get('armor', []))} slots, Weapons: {len(gear_data.get('weapons', []))}")
     
+    _bump_generation(cursor)
     conn.commit()
-    conn.close()
+    if own_conn:
+        conn.close()
+
+def _get_file_map(table, conn=None):
+    own_conn = conn is None
+    if own_conn:
+        conn = sqlite3.connect('eterspire.db')
+    cursor = conn.cursor()
+    cursor.execute(f'SELECT filename, gear_set_name FROM {table} ORDER BY rowid')
+    
+    file_map = {}
+    for filename, gear_set_name in cursor.fetchall():
+        file_map.setdefault(filename, []).append(gear_set_name)
+    
+    if own_conn:
+        conn.close()
+    return file_map
+
+def get_source_files(conn=None):
+    """Return a dict of filename -> list of gear set names scraped from it"""
+    return _get_file_map('source_files', conn)
+
+def get_duplicate_sources(conn=None):
+    """Return a dict of filename -> list of gear set names skipped there as duplicates"""
+    return _get_file_map('duplicate_sources', conn)
+
+def set_source_files(sources, conn=None, duplicates=None, commit=True):
+    """Record which gear sets came from which files, replacing entries for those files
+    
+    `duplicates` (filename -> names skipped as duplicates) is recorded the same way.
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = sqlite3.connect('eterspire.db')
+    cursor = conn.cursor()
+    
+    for table, file_map in (('source_files', sources), ('duplicate_sources', duplicates or {})):
+        for filename, gear_set_names in file_map.items():
+            cursor.execute(f'DELETE FROM {table} WHERE filename = ?', (filename,))
+            cursor.executemany(
+                f'INSERT OR IGNORE INTO {table} (filename, gear_set_name) VALUES (?, ?)',
+                [(filename, name) for name in gear_set_names]
+            )
+    
+    if commit:
+        conn.commit()
+    if own_conn:
+        conn.close()
+
+def replace_all_gear_data(all_gear_data, sources=None, duplicates=None, conn=None):
+    """Replace the whole catalog with all_gear_data in a single transaction
+    
+    Readers keep seeing the previous import until the new one is committed
+    (with one generation bump); on error nothing changes. `sources` and
+    `duplicates` are recorded after the gear sets are inserted, so they may be
+    filled while all_gear_data is consumed (see checkpoint.read_gear_sets).
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = sqlite3.connect('eterspire.db')
+    
+    try:
+        clear_database(conn, commit=False)
+        insert_all_gear_data(all_gear_data, conn, commit=False)
+        if sources is not None:
+            set_source_files(sources, conn, duplicates, commit=False)
+        commit_changes(conn)
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        if own_conn:
+            conn.close()
 
 if __name__ == "__main__":
+    import sys
+    from checkpoint import CHECKPOINT_FILE, read_gear_sets, is_complete
+    
+    # Prefer the streamed binary checkpoint, fall back to a JSON dump
+    use_checkpoint = os.path.exists(CHECKPOINT_FILE)
+    if use_checkpoint and not is_complete(CHECKPOINT_FILE):
+        print(f"Error: {CHECKPOINT_FILE} is incomplete (interrupted scrape?), run scraper.py again to finish it")
+        sys.exit(1)
+    
     print("Initializing database...")
     init_database()
-    clear_database()
-    
-    with open('all_gear_raw.json', 'r') as f:
-        all_data = json.load(f)
     
-    print(f"\nInserting {len(all_data)} gear sets...")
-    insert_all_gear_data(all_data)
+    if use_checkpoint:
+        print(f"\nInserting gear sets from {CHECKPOINT_FILE}...")
+        sources = {}
+        duplicates = {}
+        replace_all_gear_data(read_gear_sets(CHECKPOINT_FILE, sources, duplicates), sources, duplicates)
+    else:
+        with open('all_gear_raw.json', 'r') as f:
+            all_data = json.load(f)
+        
+        print(f"\nInserting {len(all_data)} gear sets...")
+        replace_all_gear_data(all_data)
     print("\nDone!")
\ No newline at end of file
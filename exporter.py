@@ -3,20 +3,246 @@ import json
 import os
 import hashlib
 from datetime import datetime
+from search import build_search_index
 
 def normalize_id_part(text):
     """Normalize text for use in IDs"""
     # Replace slashes and special chars, capitalize properly
     return text.replace(' / ', '-').replace('/', '-').replace(' ', '-')
 
+def parse_bonus_stats(bonus_rows):
+    """Decode bonus_stats rows into {quality: {category: stats}}"""
+    bonus_stats = {'normal': {}, 'excellent': {}}
+    for row in bonus_rows:
+        quality = row['quality']
+        category = row['category']
+        
+        stats = {}
+        if row['attack_speed_values']:
+            stats['bonus_attack_speed'] = json.loads(row['attack_speed_values'])
+        if row['strength_values']:
+            stats['strength'] = json.loads(row['strength_values'])
+        if row['vitality_values']:
+            stats['vitality'] = json.loads(row['vitality_values'])
+        
+        bonus_stats[quality][category] = stats
+    
+    return bonus_stats
+
+def build_armor_item(gear_set, row, bonus_stats):
+    """Build the exported item for one armor row of a gear set"""
+    gear_name = gear_set['name']
+    
+    classes = row['classes'].split(',')
+    hp_values = json.loads(row['hp_values']) if row['hp_values'] else None
+    armor_bonus = bonus_stats.get(row['quality'], {}).get('armor', {})
+    
+    # Generate ID: {GearSet}-{ItemName}-{Quality}
+    # Strip gear set prefix from item name if present (e.g., "Bronze Helm" -> "Helm")
+    item_name_for_id = row['item_name']
+    if item_name_for_id.startswith(gear_name + ' '):
+        item_name_for_id = item_name_for_id[len(gear_name) + 1:]
+    item_id = f"{gear_name}-{normalize_id_part(item_name_for_id)}-{row['quality'].capitalize()}"
+    
+    # Build base stats (only include non-null values)
+    base = {}
+    if hp_values:
+        base['hp'] = hp_values
+    
+    # Build bonuses (only include non-null values)
+    bonuses = {}
+    if armor_bonus.get('bonus_attack_speed'):
+        bonuses['bonus_attack_speed'] = armor_bonus.get('bonus_attack_speed')
+    if armor_bonus.get('strength'):
+        bonuses['strength'] = armor_bonus.get('strength')
+    if armor_bonus.get('vitality'):
+        bonuses['vitality'] = armor_bonus.get('vitality')
+    
+    item = {
+        'id': item_id,
+        'name': row['item_name'],
+        'tier': gear_set['tier'],
+        'level': gear_set['level'],
+        'allowed_classes': classes,
+        'type': 'armor',
+        'slot': row['slot'],
+        'quality': row['quality'],
+        'base': base,
+        'bonuses': bonuses,
+        'gear_set': gear_name
+    }
+    
+    return item
+
+def build_weapon_item(gear_set, row, bonus_stats):
+    """Build the exported item for one weapons row of a gear set"""
+    gear_name = gear_set['name']
+    
+    damage_values = json.loads(row['damage_values']) if row['damage_values'] else None
+    weapon_bonus = bonus_stats.get(row['quality'], {}).get('weapon', {})
+    
+    # Generate ID: {GearSet}-{WeaponType}-{Quality}
+    # Strip gear set prefix from weapon type if present (e.g., "Bronze Bardiche" -> "Bardiche")
+    weapon_type_clean = row['weapon_type']
+    if weapon_type_clean.startswith(gear_name + ' '):
+        weapon_type_clean = weapon_type_clean[len(gear_name) + 1:]
+    item_id = f"{gear_name}-{normalize_id_part(weapon_type_clean)}-{row['quality'].capitalize()}"
+    
+    # Build base stats (only include non-null values)
+    base = {}
+    if damage_values:
+        base['damage'] = damage_values
+    if row['attack_speed']:
+        base['attack_speed'] = row['attack_speed']
+    
+    # Build bonuses (only include non-null values)
+    bonuses = {}
+    if weapon_bonus.get('bonus_attack_speed'):
+        bonuses['bonus_attack_speed'] = weapon_bonus.get('bonus_attack_speed')
+    if weapon_bonus.get('strength'):
+        bonuses['strength'] = weapon_bonus.get('strength')
+    if weapon_bonus.get('vitality'):
+        bonuses['vitality'] = weapon_bonus.get('vitality')
+    
+    item = {
+        'id': item_id,
+        'name': row['weapon_type'],
+        'tier': gear_set['tier'],
+        'level': gear_set['level'],
+        'allowed_classes': [row['class']],
+        'type': weapon_type_clean,
+        'slot': 'weapon',
+        'quality': row['quality'],
+        'base': base,
+        'bonuses': bonuses,
+        'gear_set': gear_name
+    }
+    
+    return item
+
+def build_gear_set_view(cursor, gear_set):
+    """Build the exported gear set object and its individual items for one gear_sets row"""
+    gear_id = gear_set['id']
+    gear_name = gear_set['name']
+    items = []
+    
+    # Get bonus stats
+    cursor.execute('SELECT * FROM bonus_stats WHERE gear_set_id = ?', (gear_id,))
+    bonus_rows = cursor.fetchall()
+    
+    bonus_stats = parse_bonus_stats(bonus_rows)
+    
+    # Get armor pieces
+    cursor.execute('SELECT * FROM armor WHERE gear_set_id = ?', (gear_id,))
+    armor_rows = cursor.fetchall()
+    
+    armor_pieces = []
+    for row in armor_rows:
+        armor_piece = {
+            'slot': row['slot'],
+            'quality': row['quality'],
+            'classes': row['classes'].split(','),
+            'item_name': row['item_name']
+        }
+        
+        if row['hp_values']:
+            armor_piece['hp'] = json.loads(row['hp_values'])
+        
+        armor_pieces.append(armor_piece)
+        
+        # Create individual armor items (don't split by class, keep them together)
+        items.append(build_armor_item(gear_set, row, bonus_stats))
+    
+    # Get weapons
+    cursor.execute('SELECT * FROM weapons WHERE gear_set_id = ?', (gear_id,))
+    weapon_rows = cursor.fetchall()
+    
+    weapons = []
+    for row in weapon_rows:
+        weapon = {
+            'class': row['class'],
+            'weapon_type': row['weapon_type'],
+            'quality': row['quality']
+        }
+        
+        if row['damage_values']:
+            weapon['damage'] = json.loads(row['damage_values'])
+        if row['attack_speed']:
+            weapon['attack_speed'] = row['attack_speed']
+        
+        weapons.append(weapon)
+        
+        # Create individual weapon item
+        items.append(build_weapon_item(gear_set, row, bonus_stats))
+    
+    # Build gear set
+    gear_item = {
+        'name': gear_name,
+        'tier': gear_set['tier'],
+        'level': gear_set['level'],
+        'bonus_stats': bonus_stats,
+        'armor': armor_pieces,
+        'weapons': weapons
+    }
+    
+    return gear_item, items
+
+def write_exports(all_gear, all_items, skip_unchanged=False, cache=None):
+    """Write the gear set and item views to the output JSON files
+    
+    With skip_unchanged, files whose serialized content is identical to what is
+    already on disk are left untouched. Passing a `cache` dict (path -> content
+    last written) compares against it instead of re-reading the files, and keeps
+    it up to date; with skip_unchanged, files missing from the cache are still
+    compared against the disk. Returns the list of files written.
+    """
+    os.makedirs('output', exist_ok=True)
+    
+    # Also export separated by slot for convenience
+    weapons_only = [item for item in all_items if item['slot'] == 'weapon']
+    armor_only = [item for item in all_items if item['slot'] != 'weapon']
+    
+    # Prefix/trigram search index over the items (compact, it is only read by search.py)
+    search_index = build_search_index(all_items)
+    
+    exports = [
+        ('output/gear_sets.json', json.dumps(all_gear, indent=2), f"{len(all_gear)} gear sets"),
+        ('output/items.json', json.dumps(all_items, indent=2), f"{len(all_items)} individual items"),
+        ('output/weapons.json', json.dumps(weapons_only, indent=2), f"{len(weapons_only)} weapon items"),
+        ('output/armor.json', json.dumps(armor_only, indent=2), f"{len(armor_only)} armor items"),
+        ('output/search_index.json', json.dumps(search_index, separators=(',', ':')),
+         f"{len(search_index['docs'])} indexed items, {len(search_index['tokens'])} terms"),
+    ]
+    
+    written = []
+    for path, content, summary in exports:
+        if cache is not None and path in cache:
+            unchanged = cache[path] == content
+        elif skip_unchanged and os.path.exists(path):
+            with open(path, 'r') as f:
+                unchanged = f.read() == content
+        else:
+            unchanged = False
+        
+        if unchanged:
+            print(f"= Unchanged {path}")
+            continue
+        
+        with open(path, 'w') as f:
+            f.write(content)
+        if cache is not None:
+            cache[path] = content
+        written.append(path)
+        print(f"✓ Exported {path} ({summary})")
+    
+    return written
+
 def export_to_json():
     """Export database to JSON files for API"""
     conn = sqlite3.connect('eterspire.db')
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     
-    os.makedirs('output', exist_ok=True)
-    
     # Get all gear sets
     cursor.execute('SELECT * FROM gear_sets')
     gear_sets = cursor.fetchall()
@@ -25,184 +251,74 @@ def export_to_json():
     all_items = []  # Single array for all individual items
     
     for gear_set in gear_sets:
-        gear_id = gear_set['id']
-        gear_name = gear_set['name']
-        
-        # Get bonus stats
-        cursor.execute('SELECT * FROM bonus_stats WHERE gear_set_id = ?', (gear_id,))
-        bonus_rows = cursor.fetchall()
-        
-        bonus_stats = {'normal': {}, 'excellent': {}}
-        for row in bonus_rows:
-            quality = row['quality']
-            category = row['category']
-            
-            stats = {}
-            if row['attack_speed_values']:
-                stats['bonus_attack_speed'] = json.loads(row['attack_speed_values'])
-            if row['strength_values']:
-                stats['strength'] = json.loads(row['strength_values'])
-            if row['vitality_values']:
-                stats['vitality'] = json.loads(row['vitality_values'])
-            
-            bonus_stats[quality][category] = stats
-        
-        # Get armor pieces
-        cursor.execute('SELECT * FROM armor WHERE gear_set_id = ?', (gear_id,))
-        armor_rows = cursor.fetchall()
-        
-        armor_pieces = []
-        for row in armor_rows:
-            armor_piece = {
-                'slot': row['slot'],
-                'quality': row['quality'],
-                'classes': row['classes'].split(','),
-                'item_name': row['item_name']
-            }
-            
-            if row['hp_values']:
-                armor_piece['hp'] = json.loads(row['hp_values'])
-            
-            armor_pieces.append(armor_piece)
-            
-            # Create individual armor items (don't split by class, keep them together)
-            classes = row['classes'].split(',')
-            hp_values = json.loads(row['hp_values']) if row['hp_values'] else None
-            armor_bonus = bonus_stats.get(row['quality'], {}).get('armor', {})
-            
-            # Generate ID: {GearSet}-{ItemName}-{Quality}
-            # Strip gear set prefix from item name if present (e.g., "Bronze Helm" -> "Helm")
-            item_name_for_id = row['item_name']
-            if item_name_for_id.startswith(gear_name + ' '):
-                item_name_for_id = item_name_for_id[len(gear_name) + 1:]
-            item_id = f"{gear_name}-{normalize_id_part(item_name_for_id)}-{row['quality'].capitalize()}"
-            
-            # Build base stats (only include non-null values)
-            base = {}
-            if hp_values:
-                base['hp'] = hp_values
-            
-            # Build bonuses (only include non-null values)
-            bonuses = {}
-            if armor_bonus.get('bonus_attack_speed'):
-                bonuses['bonus_attack_speed'] = armor_bonus.get('bonus_attack_speed')
-            if armor_bonus.get('strength'):
-                bonuses['strength'] = armor_bonus.get('strength')
-            if armor_bonus.get('vitality'):
-                bonuses['vitality'] = armor_bonus.get('vitality')
-            
-            item = {
-                'id': item_id,
-                'name': row['item_name'],
-                'tier': gear_set['tier'],
-                'level': gear_set['level'],
-                'allowed_classes': classes,
-                'type': 'armor',
-                'slot': row['slot'],
-                'quality': row['quality'],
-                'base': base,
-                'bonuses': bonuses,
-                'gear_set': gear_name
-            }
-            
-            all_items.append(item)
-        
-        # Get weapons
-        cursor.execute('SELECT * FROM weapons WHERE gear_set_id = ?', (gear_id,))
-        weapon_rows = cursor.fetchall()
-        
-        weapons = []
-        for row in weapon_rows:
-            weapon = {
-                'class': row['class'],
-                'weapon_type': row['weapon_type'],
-                'quality': row['quality']
-            }
-            
-            if row['damage_values']:
-                weapon['damage'] = json.loads(row['damage_values'])
-            if row['attack_speed']:
-                weapon['attack_speed'] = row['attack_speed']
-            
-            weapons.append(weapon)
-            
-            # Create individual weapon item
-            damage_values = json.loads(row['damage_values']) if row['damage_values'] else None
-            weapon_bonus = bonus_stats.get(row['quality'], {}).get('weapon', {})
-            
-            # Generate ID: {GearSet}-{WeaponType}-{Quality}
-            # Strip gear set prefix from weapon type if present (e.g., "Bronze Bardiche" -> "Bardiche")
-            weapon_type_clean = row['weapon_type']
-            if weapon_type_clean.startswith(gear_name + ' '):
-                weapon_type_clean = weapon_type_clean[len(gear_name) + 1:]
-            item_id = f"{gear_name}-{normalize_id_part(weapon_type_clean)}-{row['quality'].capitalize()}"
-            
-            # Build base stats (only include non-null values)
-            base = {}
-            if damage_values:
-                base['damage'] = damage_values
-            if row['attack_speed']:
-                base['attack_speed'] = row['attack_speed']
-            
-            # Build bonuses (only include non-null values)
-            bonuses = {}
-            if weapon_bonus.get('bonus_attack_speed'):
-                bonuses['bonus_attack_speed'] = weapon_bonus.get('bonus_attack_speed')
-            if weapon_bonus.get('strength'):
-                bonuses['strength'] = weapon_bonus.get('strength')
-            if weapon_bonus.get('vitality'):
-                bonuses['vitality'] = weapon_bonus.get('vitality')
-            
-            item = {
-                'id': item_id,
-                'name': row['weapon_type'],
-                'tier': gear_set['tier'],
-                'level': gear_set['level'],
-                'allowed_classes': [row['class']],
-                'type': weapon_type_clean,
-                'slot': 'weapon',
-                'quality': row['quality'],
-                'base': base,
-                'bonuses': bonuses,
-                'gear_set': gear_name
-            }
-            
-            all_items.append(item)
-        
-        # Build gear set
-        gear_item = {
-            'name': gear_name,
-            'tier': gear_set['tier'],
-            'level': gear_set['level'],
-            'bonus_stats': bonus_stats,
-            'armor': armor_pieces,
-            'weapons': weapons
-        }
-        
+        gear_item, items = build_gear_set_view(cursor, gear_set)
         all_gear.append(gear_item)
+        all_items.extend(items)
     
     conn.close()
     
-    # Export files
-    with open('output/gear_sets.json', 'w') as f:
-        json.dump(all_gear, f, indent=2)
-    print(f"✓ Exported output/gear_sets.json ({len(all_gear)} gear sets)")
+    return write_exports(all_gear, all_items)
+
+def _read_output(path):
+    """Return the text of a previously exported file, or None if it is missing"""
+    try:
+        with open(path, 'r') as f:
+            return f.read()
+    except OSError:
+        return None
+
+def export_gear_sets(gear_set_names):
+    """Re-export only the given gear sets, splicing them into the existing output files
     
-    with open('output/items.json', 'w') as f:
-        json.dump(all_items, f, indent=2)
-    print(f"✓ Exported output/items.json ({len(all_items)} individual items)")
+    Unaffected gear sets are reused from the current output/gear_sets.json and
+    output/items.json, so only the changed sets are rebuilt from the database.
+    Falls back to a full export when there is no previous output to patch.
     
-    # Also export separated by slot for convenience
-    weapons_only = [item for item in all_items if item['slot'] == 'weapon']
-    armor_only = [item for item in all_items if item['slot'] != 'weapon']
+    The database side is O(changed sets), but the splice is still O(catalog):
+    both files are parsed, and every output (each one a single JSON array, plus
+    the search index over all items) is re-serialized, as any change rewrites
+    the whole file. At the catalog's size this is a small part of a rebuild next
+    to parsing the HTML; watch.py --daemon keeps the views resident instead.
+    """
+    # Read once: parsed here, then compared against in write_exports
+    previous = {path: _read_output(path) for path in ('output/gear_sets.json', 'output/items.json')}
+    try:
+        existing_gear = json.loads(previous['output/gear_sets.json'])
+        existing_items = json.loads(previous['output/items.json'])
+    except (TypeError, ValueError):
+        return export_to_json()
+    
+    gear_by_name = {gear['name']: gear for gear in existing_gear}
+    items_by_set = {}
+    for item in existing_items:
+        items_by_set.setdefault(item['gear_set'], []).append(item)
+    
+    conn = sqlite3.connect('eterspire.db')
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
     
-    with open('output/weapons.json', 'w') as f:
-        json.dump(weapons_only, f, indent=2)
-    print(f"✓ Exported output/weapons.json ({len(weapons_only)} weapon items)")
+    cursor.execute('SELECT * FROM gear_sets ORDER BY id')
+    gear_sets = cursor.fetchall()
+    
+    all_gear = []
+    all_items = []
+    rebuilt = 0
+    
+    for gear_set in gear_sets:
+        gear_name = gear_set['name']
+        if gear_name in gear_set_names or gear_name not in gear_by_name:
+            gear_item, items = build_gear_set_view(cursor, gear_set)
+            rebuilt += 1
+        else:
+            gear_item, items = gear_by_name[gear_name], items_by_set.get(gear_name, [])
+        
+        all_gear.append(gear_item)
+        all_items.extend(items)
+    
+    conn.close()
     
-    with open('output/armor.json', 'w') as f:
-        json.dump(armor_only, f, indent=2)
-    print(f"✓ Exported output/armor.json ({len(armor_only)} armor items)")
+    print(f"Rebuilt {rebuilt} of {len(all_gear)} gear set(s)")
+    return write_exports(all_gear, all_items, skip_unchanged=True, cache=previous)
 
 if __name__ == "__main__":
     export_to_json()
\ No newline at end of file
@@ -6,21 +6,19 @@ Runs the complete data generation pipeline from wiki HTML to clean API-ready JSO
 
 import os
 import sys
-from scraper import scrape_all_files
-from database import init_database, clear_database, insert_all_gear_data
-from exporter import export_to_json
-import json
 
+from stages import print_header, run_stages, print_summary
 
-def print_header(text):
-    """Print a formatted section header"""
-    print("\n" + "=" * 60)
-    print(f"  {text}")
-    print("=" * 60)
+# scraper (BeautifulSoup), database and exporter are imported inside the
+# functions that use them, so importing this module (e.g. for --help) stays fast.
 
 
-def main():
-    """Run the complete data pipeline"""
+def main(force=False, concurrent=False):
+    """Run the complete data pipeline, skipping stages whose inputs are unchanged
+    
+    With `concurrent`, scraping, import and export overlap instead (see
+    concurrent_pipeline.py); every stage runs and the stage cache is bypassed.
+    """
     
     print_header("🗡️  ETERSPIRE API DATA GENERATOR")
     
@@ -46,35 +44,18 @@ def main():
     
     print(f"\n✅ Found {len(html_files)} HTML file(s) to process")
     
-    # Step 1: Scrape
-    print_header("STEP 1: Scraping Wiki HTML Tables")
-    all_data = scrape_all_files()
-    
-    if not all_data:
-        print("\n❌ ERROR: No data was scraped!")
-        return 1
-    
-    with open('all_gear_raw.json', 'w') as f:
-        json.dump(all_data, f, indent=2)
-    
-    print(f"\n✅ Successfully scraped {len(all_data)} gear set(s)")
-    print(f"   Raw data saved to: all_gear_raw.json")
+    if concurrent:
+        from concurrent_pipeline import run_concurrent
+        
+        print_header("Scraping, Importing and Exporting Concurrently")
+        exit_code = run_concurrent()
+    else:
+        # Scrape -> import -> export, each skipped when up to date
+        exit_code, results = run_stages(force=force)
+        print_summary(results)
     
-    # Step 2: Import to Database
-    print_header("STEP 2: Importing to Database")
-    print("Initializing database...")
-    init_database()
-    clear_database()
-    
-    print(f"Importing {len(all_data)} gear set(s)...")
-    insert_all_gear_data(all_data)
-    
-    print("\n✅ Database import complete")
-    print(f"   Database file: eterspire.db")
-    
-    # Step 3: Export JSON
-    print_header("STEP 3: Exporting JSON Files")
-    export_to_json()
+    if exit_code:
+        return exit_code
     
     # Final Summary
     print_header("✅ PIPELINE COMPLETE!")
@@ -84,6 +65,7 @@ def main():
     print("   📁 output/weapons.json    - Weapons only")
     print("   📁 output/armor.json      - Armor only")
     print("   📁 output/gear_sets.json  - Hierarchical gear sets")
+    print("   📁 output/search_index.json - Prefix/fuzzy search index (see search.py)")
     
     print("\n🎮 Data is ready to use!")
     print("\n" + "=" * 60 + "\n")
@@ -91,6 +73,48 @@ def main():
     return 0
 
 
+def run_incremental(changed_files):
+    """Rebuild only the gear sets contributed by the given changed HTML files
+    
+    Re-scrapes just those files, patches their gear sets in the database and
+    splices the rebuilt sets into the existing exports. Falls back to the full
+    pipeline when there is no previous run to patch.
+    """
+    from scraper import scrape_changed_files
+    from database import (
+        init_database, replace_gear_sets, get_source_files, get_duplicate_sources, set_source_files
+    )
+    from exporter import export_gear_sets
+    
+    print_header("🔁 INCREMENTAL REBUILD")
+    
+    init_database()
+    sources = get_source_files()
+    if not sources:
+        print("No previous run recorded, running the full pipeline...")
+        return main()
+    
+    updated_sets, removed_names, new_sources, new_duplicates = scrape_changed_files(
+        changed_files, sources, get_duplicate_sources()
+    )
+    
+    if not updated_sets and not removed_names:
+        # Still record which duplicates the changed files contain now
+        set_source_files(new_sources, duplicates=new_duplicates)
+        print("\nNo gear sets affected, outputs are up to date")
+        return 0
+    
+    print(f"\nPatching {len(updated_sets)} gear set(s), removing {len(removed_names)}...")
+    replace_gear_sets(updated_sets, removed_names)
+    set_source_files(new_sources, duplicates=new_duplicates)
+    
+    print("")
+    export_gear_sets({gear_data['name'] for gear_data in updated_sets})
+    
+    print_header("✅ INCREMENTAL REBUILD COMPLETE")
+    return 0
+
+
 if __name__ == "__main__":
     try:
         exit_code = main()
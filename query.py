@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Eterspire API Data Generator - Read-Only Query API
+Lets services query eterspire.db directly instead of parsing the exported JSON.
+
+Connections are opened read-only (`mode=ro`) from a small thread-safe pool, so
+readers never take write locks; as the database is in WAL mode (see
+database.init_database) each query runs in one read transaction and sees a
+consistent snapshot while the pipeline writes, without blocking its commits.
+Imports replace the catalog in a single transaction, so a query sees either
+the previous import or the new one, never a partial one.
+
+Every query uses a fixed SQL string, so SQLite's per-connection statement
+cache keeps them prepared. Results are kept in an LRU cache, tagged with the
+import generation they were read at and dropped whenever the pipeline bumps it
+(see database.get_generation).
+
+Items are returned in the same shape as output/items.json.
+"""
+
+import queue
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from exporter import parse_bonus_stats, build_armor_item, build_weapon_item, build_gear_set_view
+
+_GENERATION_SQL = "SELECT value FROM pipeline_meta WHERE key = 'generation'"
+
+_GEAR_SET_SQL = 'SELECT * FROM gear_sets WHERE name = ?'
+
+_BONUS_SQL = 'SELECT * FROM bonus_stats WHERE gear_set_id = ?'
+
+_ITEM_FILTERS = ['gear_set', 'tier', 'class_name', 'slot', 'quality']
+
+_ARMOR_SQL = '''
+    SELECT a.*, g.name AS gear_name, g.tier, g.level
+    FROM armor a JOIN gear_sets g ON g.id = a.gear_set_id
+    WHERE (:gear_set IS NULL OR g.name = :gear_set)
+      AND (:tier IS NULL OR g.tier = :tier)
+      AND (:class_name IS NULL OR instr(',' || a.classes || ',', ',' || :class_name || ',') > 0)
+      AND (:slot IS NULL OR a.slot = :slot)
+      AND (:quality IS NULL OR a.quality = :quality)
+    ORDER BY g.id, a.id
+'''
+
+_WEAPONS_SQL = '''
+    SELECT w.*, g.name AS gear_name, g.tier, g.level
+    FROM weapons w JOIN gear_sets g ON g.id = w.gear_set_id
+    WHERE (:gear_set IS NULL OR g.name = :gear_set)
+      AND (:tier IS NULL OR g.tier = :tier)
+      AND (:class_name IS NULL OR w.class = :class_name)
+      AND (:slot IS NULL OR :slot = 'weapon')
+      AND (:quality IS NULL OR w.quality = :quality)
+    ORDER BY g.id, w.id
+'''
+
+
+class GearDatabase:
+    """Thread-safe, read-only query layer over eterspire.db
+    
+    Results may be shared between callers through the cache; treat them as
+    read-only.
+    """
+    
+    def __init__(self, path='eterspire.db', pool_size=4, cache_size=256, immutable=False, timeout=30):
+        # immutable=1 skips all locking and change detection: only for a snapshot
+        # file that is never written again (e.g. a copy shipped with a service)
+        self.uri = f"file:{path}?mode=ro" + ("&immutable=1" if immutable else "")
+        self.pool_size = pool_size
+        self.cache_size = cache_size
+        self.timeout = timeout  # seconds to wait for a free pooled connection
+        
+        self._pool = queue.LifoQueue()
+        self._created = 0
+        self._pool_lock = threading.Lock()
+        
+        self._cache = OrderedDict()
+        self._cache_generation = None
+        self._cache_lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+    
+    def _connect(self):
+        conn = sqlite3.connect(self.uri, uri=True, check_same_thread=False, cached_statements=64)
+        conn.row_factory = sqlite3.Row
+        return conn
+    
+    @contextmanager
+    def _connection(self):
+        """Borrow a pooled connection, opening a new one while under pool_size"""
+        conn = None
+        with self._pool_lock:
+            if self._pool.empty() and self._created < self.pool_size:
+                # Only counted once open, so a failed connect doesn't use up a slot
+                conn = self._connect()
+                self._created += 1
+        if conn is None:
+            try:
+                conn = self._pool.get(timeout=self.timeout)
+            except queue.Empty:
+                raise sqlite3.OperationalError(
+                    f"No pooled connection became free within {self.timeout}s"
+                ) from None
+        
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+    
+    def close(self):
+        """Close all pooled connections"""
+        with self._pool_lock:
+            while not self._pool.empty():
+                self._pool.get().close()
+                self._created -= 1
+    
+    def generation(self):
+        """Current import generation of the database (0 if unknown)"""
+        with self._connection() as conn:
+            return self._read_generation(conn)
+    
+    @staticmethod
+    def _read_generation(conn):
+        try:
+            row = conn.execute(_GENERATION_SQL).fetchone()
+        except sqlite3.OperationalError:
+            return 0
+        return row[0] if row else 0
+    
+    def _cached(self, key, compute):
+        """Return compute(conn) for key, from the cache while the generation is unchanged
+        
+        The generation and every query in compute are read in one read
+        transaction on one connection, so the result is a single snapshot and
+        is cached under the generation it was read at.
+        """
+        with self._connection() as conn:
+            conn.execute('BEGIN')
+            try:
+                generation = self._read_generation(conn)
+                
+                with self._cache_lock:
+                    # A reader on an older snapshot must not roll the cache back
+                    if self._cache_generation is None or generation > self._cache_generation:
+                        if self._cache:
+                            self.stats['invalidations'] += 1
+                        self._cache.clear()
+                        self._cache_generation = generation
+                    if generation == self._cache_generation and key in self._cache:
+                        self._cache.move_to_end(key)
+                        self.stats['hits'] += 1
+                        return self._cache[key]
+                    self.stats['misses'] += 1
+                
+                result = compute(conn)
+            finally:
+                conn.commit()
+        
+        with self._cache_lock:
+            if generation == self._cache_generation:
+                self._cache[key] = result
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return result
+    
+    def gear_set(self, name):
+        """Hierarchical gear set (as in output/gear_sets.json), or None"""
+        def compute(conn):
+            cursor = conn.cursor()
+            row = cursor.execute(_GEAR_SET_SQL, (name,)).fetchone()
+            return build_gear_set_view(cursor, row)[0] if row else None
+        
+        return self._cached(('gear_set', name), compute)
+    
+    def find_items(self, gear_set=None, tier=None, class_name=None, slot=None, quality=None):
+        """Items matching every given filter, in export order"""
+        params = {'gear_set': gear_set, 'tier': tier, 'class_name': class_name,
+                  'slot': slot, 'quality': quality}
+        
+        def compute(conn):
+            cursor = conn.cursor()
+            bonus_by_set = {}
+            rows = []
+            
+            if slot != 'weapon':
+                rows += [(row['gear_set_id'], 0, row['id'], build_armor_item, row)
+                         for row in cursor.execute(_ARMOR_SQL, params).fetchall()]
+            rows += [(row['gear_set_id'], 1, row['id'], build_weapon_item, row)
+                     for row in cursor.execute(_WEAPONS_SQL, params).fetchall()]
+            
+            # Same order as the exporter: by gear set, armor before weapons
+            rows.sort(key=lambda entry: entry[:3])
+            
+            items = []
+            for gear_set_id, _, _, build_item, row in rows:
+                if gear_set_id not in bonus_by_set:
+                    bonus_rows = cursor.execute(_BONUS_SQL, (gear_set_id,)).fetchall()
+                    bonus_by_set[gear_set_id] = parse_bonus_stats(bonus_rows)
+                
+                gear = {'name': row['gear_name'], 'tier': row['tier'], 'level': row['level']}
+                items.append(build_item(gear, row, bonus_by_set[gear_set_id]))
+            return items
+        
+        key = ('items',) + tuple(params[name] for name in _ITEM_FILTERS)
+        return self._cached(key, compute)
+    
+    def items_by_gear_set(self, name):
+        return self.find_items(gear_set=name)
+    
+    def items_by_tier(self, tier):
+        return self.find_items(tier=tier)
+    
+    def items_by_class(self, class_name):
+        return self.find_items(class_name=class_name)
+    
+    def items_by_slot(self, slot):
+        return self.find_items(slot=slot)
+    
+    def items_by_quality(self, quality):
+        return self.find_items(quality=quality)
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+    
+    # python query.py [filter=value ...], e.g. python query.py tier=1 slot=helm quality=normal
+    filters = dict(arg.split('=', 1) for arg in sys.argv[1:])
+    if 'tier' in filters:
+        filters['tier'] = int(filters['tier'])
+    if 'class' in filters:
+        filters['class_name'] = filters.pop('class')
+    
+    db = GearDatabase()
+    for item in db.find_items(**filters):
+        print(json.dumps({'id': item['id'], 'name': item['name'], 'allowed_classes': item['allowed_classes']}))
+    db.close()
@@ -1,4 +1,3 @@
-import json
 import os
 import re
 from bs4 import BeautifulSoup
@@ -233,60 +232,178 @@ def scrape_gear_html(filename):
     # Return list of all gear sets found in this file
     return list(gear_sets.values())
 
-def scrape_all_files():
-    """Scrape all HTML files in manual-download folder"""
+def iter_scraped_files(sources=None, skip_files=(), seen_names=None, duplicates=None):
+    """Scrape all HTML files in manual-download folder, yielding (filename, gear sets) per file
+    
+    If a dict is passed as `sources`, it is filled with filename -> list of the
+    gear set names kept from that file, and `duplicates` likewise with the names
+    skipped as duplicates. Files in `skip_files` are not parsed and names
+    already in `seen_names` count as duplicates (used to resume a run).
+    """
     
     download_folder = 'manual-download'
     
     if not os.path.exists(download_folder):
         print(f"Error: {download_folder} folder doesn't exist")
-        return []
+        return
     
     html_files = [f for f in os.listdir(download_folder) if f.endswith('.html')]
     
     if not html_files:
         print(f"No HTML files found in {download_folder}")
-        return []
+        return
     
     print(f"Found {len(html_files)} HTML files")
     
-    all_gear_data = []
-    seen_names = set()
+    seen_names = set(seen_names or ())
     
     for filename in html_files:
+        if filename in skip_files:
+            print(f"\nAlready scraped: {filename}")
+            continue
+        
         print(f"\nProcessing: {filename}")
+        if sources is not None:
+            sources[filename] = []
+        if duplicates is not None:
+            duplicates[filename] = []
         try:
             # scrape_gear_html now returns a list of gear sets
             gear_sets = scrape_gear_html(filename)
-            
-            if not gear_sets:
-                print(f"  WARNING: No gear sets found in {filename}")
-                continue
-            
-            # Process each gear set found in this file
-            for gear_data in gear_sets:
-                if gear_data['name'] in seen_names:
-                    print(f"  SKIPPED - Duplicate of {gear_data['name']}")
-                    continue
-                
-                seen_names.add(gear_data['name'])
-                all_gear_data.append(gear_data)
-                print(f"  ✓ {gear_data['name']}: Tier {gear_data['tier']} | Level {gear_data['level']} | Armor: {len(gear_data['armor'])} pieces | Weapons: {len(gear_data['weapons'])}")
         except Exception as e:
             print(f"  Error: {e}")
             import traceback
             traceback.print_exc()
+            continue
+        
+        if not gear_sets:
+            print(f"  WARNING: No gear sets found in {filename}")
+        
+        # Process each gear set found in this file
+        kept = []
+        for gear_data in gear_sets:
+            if gear_data['name'] in seen_names:
+                print(f"  SKIPPED - Duplicate of {gear_data['name']}")
+                if duplicates is not None:
+                    duplicates[filename].append(gear_data['name'])
+                continue
+            
+            seen_names.add(gear_data['name'])
+            if sources is not None:
+                sources[filename].append(gear_data['name'])
+            print(f"  ✓ {gear_data['name']}: Tier {gear_data['tier']} | Level {gear_data['level']} | Armor: {len(gear_data['armor'])} pieces | Weapons: {len(gear_data['weapons'])}")
+            kept.append(gear_data)
+        
+        yield filename, kept
+
+def iter_all_files(sources=None, duplicates=None):
+    """Scrape all HTML files in manual-download folder, yielding gear sets as each file is parsed"""
+    for filename, gear_sets in iter_scraped_files(sources, duplicates=duplicates):
+        yield from gear_sets
+
+def scrape_all_files(sources=None, duplicates=None):
+    """Scrape all HTML files in manual-download folder
+    
+    If a dict is passed as `sources`, it is filled with filename -> list of the
+    gear set names kept from that file, and `duplicates` likewise with the names
+    skipped as duplicates.
+    """
+    return list(iter_all_files(sources, duplicates))
+
+def scrape_changed_files(changed_files, sources, duplicates=None):
+    """Re-scrape only the changed HTML files
     
-    return all_gear_data
+    `sources` maps filename -> gear set names from the previous run, and
+    `duplicates` filename -> names that file also contains but skipped as
+    duplicates. Returns (updated gear sets, names of removed gear sets, new
+    sources, new duplicates), the last two covering every re-scraped file.
+    Gear sets already provided by an unchanged file are skipped as duplicates,
+    as in scrape_all_files; a gear set dropped by its file is taken over by
+    another file that still contains it.
+    """
+    changed = sorted({os.path.basename(path) for path in changed_files})
+    duplicates = duplicates or {}
+    
+    # Gear sets owned by files that did not change can't be claimed by a changed file
+    owned_elsewhere = {
+        name
+        for filename, names in sources.items() if filename not in changed
+        for name in names
+    }
+    
+    updated_sets = []
+    removed_names = set()
+    new_sources = {}
+    new_duplicates = {}
+    
+    for filename in changed:
+        old_names = sources.get(filename, [])
+        
+        if os.path.exists(os.path.join('manual-download', filename)):
+            print(f"\nProcessing: {filename}")
+            gear_sets = scrape_gear_html(filename)
+        else:
+            print(f"\nRemoved: {filename}")
+            gear_sets = []
+        
+        kept_names = []
+        duplicate_names = []
+        for gear_data in gear_sets:
+            if gear_data['name'] in owned_elsewhere:
+                print(f"  SKIPPED - Duplicate of {gear_data['name']}")
+                duplicate_names.append(gear_data['name'])
+                continue
+            
+            owned_elsewhere.add(gear_data['name'])
+            kept_names.append(gear_data['name'])
+            updated_sets.append(gear_data)
+        
+        removed_names.update(name for name in old_names if name not in kept_names)
+        new_sources[filename] = kept_names
+        new_duplicates[filename] = duplicate_names
+    
+    removed_names -= {gear_data['name'] for gear_data in updated_sets}
+    
+    # Unchanged files that skipped a removed gear set as a duplicate now provide it
+    for filename, names in duplicates.items():
+        if filename in changed or not removed_names.intersection(names):
+            continue
+        if not os.path.exists(os.path.join('manual-download', filename)):
+            continue
+        
+        print(f"\nProcessing: {filename} (provides removed gear sets)")
+        kept_names = list(sources.get(filename, []))
+        duplicate_names = []
+        for gear_data in scrape_gear_html(filename):
+            if gear_data['name'] in removed_names:
+                removed_names.discard(gear_data['name'])
+                kept_names.append(gear_data['name'])
+                updated_sets.append(gear_data)
+            elif gear_data['name'] not in kept_names:
+                duplicate_names.append(gear_data['name'])
+        
+        new_sources[filename] = kept_names
+        new_duplicates[filename] = duplicate_names
+    
+    return updated_sets, removed_names, new_sources, new_duplicates
 
 if __name__ == "__main__":
-    print("Scraping all gear pages...\n")
+    from checkpoint import CHECKPOINT_FILE, CheckpointWriter
     
-    all_data = scrape_all_files()
+    print("Scraping all gear pages...\n")
     
-    with open('all_gear_raw.json', 'w') as f:
-        json.dump(all_data, f, indent=2)
+    # Appends each file's gear sets as it is parsed; rerun to resume after an interruption
+    writer = CheckpointWriter(CHECKPOINT_FILE, resume=True)
+    duplicates = {}
+    complete = False
+    try:
+        for filename, gear_sets in iter_scraped_files(skip_files=writer.completed_files, seen_names=writer.seen_names,
+                                                      duplicates=duplicates):
+            writer.add_file(filename, gear_sets, duplicates[filename])
+        complete = True
+    finally:
+        writer.close(complete=complete)
     
     print(f"\n{'='*50}")
-    print(f"Scraped {len(all_data)} gear sets")
-    print(f"Data saved to all_gear_raw.json")
\ No newline at end of file
+    print(f"Scraped {writer.gear_set_count} gear sets")
+    print(f"Data saved to {CHECKPOINT_FILE}")
\ No newline at end of file
@@ -0,0 +1,202 @@
+"""
+Eterspire API Data Generator - Search Index
+Builds a compact prefix + trigram index over item names, gear sets, weapon types
+and allowed classes (exported as output/search_index.json), and answers ranked,
+typo-tolerant queries against it, e.g. "bron hel" -> Bronze Helm.
+"""
+
+import bisect
+import json
+import re
+
+INDEX_VERSION = 1
+
+# Field weights: a hit in the item name ranks above a hit in its gear set, type or classes
+FIELD_WEIGHTS = {
+    'name': 1.0,
+    'gear_set': 0.8,
+    'type': 0.6,
+    'allowed_classes': 0.5,
+}
+
+# Fields kept per document so results can be shown without loading items.json
+DOC_FIELDS = ['id', 'name', 'gear_set', 'type', 'slot', 'quality', 'tier']
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+def tokenize(text):
+    """Lowercase word tokens of a string"""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def trigrams(token):
+    """Padded trigrams of a token, so short tokens and word starts still get some"""
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def build_search_index(items):
+    """Build the serializable search index for a list of exported items"""
+    docs = []
+    postings = {}  # token -> {doc: weight}
+    
+    for doc_id, item in enumerate(items):
+        docs.append([item.get(field) for field in DOC_FIELDS])
+        
+        for field, weight in FIELD_WEIGHTS.items():
+            value = item.get(field)
+            if isinstance(value, list):
+                value = ' '.join(value)
+            for token in tokenize(value or ''):
+                token_docs = postings.setdefault(token, {})
+                token_docs[doc_id] = max(token_docs.get(doc_id, 0), weight)
+    
+    tokens = sorted(postings)
+    
+    # Trigram -> indexes into the sorted token list, for typo-tolerant lookups
+    trigram_map = {}
+    for token_index, token in enumerate(tokens):
+        for trigram in sorted(trigrams(token)):
+            trigram_map.setdefault(trigram, []).append(token_index)
+    
+    return {
+        'version': INDEX_VERSION,
+        'fields': DOC_FIELDS,
+        'docs': docs,
+        'tokens': tokens,
+        'postings': [sorted(postings[token].items()) for token in tokens],
+        'trigrams': trigram_map,
+    }
+
+
+def _edit_distance(a, b, limit):
+    """Optimal string alignment distance (with transpositions), or limit + 1 once exceeded"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (previous_previous is not None and i > 1 and j > 1
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+def _max_typos(token):
+    if len(token) >= 7:
+        return 2
+    if len(token) >= 3:
+        return 1
+    return 0
+
+
+class SearchIndex:
+    """Loads a search index once and answers ranked prefix/fuzzy queries"""
+    
+    def __init__(self, index):
+        if index.get('version') != INDEX_VERSION:
+            raise ValueError(f"Unsupported search index version: {index.get('version')}")
+        
+        self.fields = index['fields']
+        self.docs = index['docs']
+        self.tokens = index['tokens']
+        self.postings = index['postings']
+        self.trigrams = index['trigrams']
+        self._token_matches = {}
+    
+    @classmethod
+    def load(cls, path='output/search_index.json'):
+        with open(path, 'r') as f:
+            return cls(json.load(f))
+    
+    def match_tokens(self, query_token):
+        """Return {token index: score} for index tokens matching one query token
+        
+        Exact matches score 1.0 and prefix matches 0.9; otherwise tokens within a
+        small edit distance (of the whole token or of its prefix) score lower.
+        """
+        cached = self._token_matches.get(query_token)
+        if cached is not None:
+            return cached
+        
+        matches = {}
+        
+        # Prefix matches: a contiguous run in the sorted token list
+        start = bisect.bisect_left(self.tokens, query_token)
+        for token_index in range(start, len(self.tokens)):
+            token = self.tokens[token_index]
+            if not token.startswith(query_token):
+                break
+            matches[token_index] = 1.0 if token == query_token else 0.9
+        
+        # Typo tolerance: only tokens sharing a trigram are worth an edit distance check
+        limit = _max_typos(query_token)
+        if limit:
+            candidates = set()
+            for trigram in trigrams(query_token):
+                candidates.update(self.trigrams.get(trigram, ()))
+            
+            for token_index in candidates - matches.keys():
+                token = self.tokens[token_index]
+                distance = min(
+                    _edit_distance(query_token, token, limit),
+                    _edit_distance(query_token, token[:len(query_token)], limit),
+                )
+                if distance <= limit:
+                    matches[token_index] = 0.7 - 0.15 * distance
+        
+        if len(self._token_matches) > 4096:
+            self._token_matches.clear()
+        self._token_matches[query_token] = matches
+        return matches
+    
+    def search(self, query, limit=10):
+        """Return up to `limit` items matching every word of the query, best first"""
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return []
+        
+        scores = None
+        for query_token in query_tokens:
+            token_scores = {}
+            for token_index, match_score in self.match_tokens(query_token).items():
+                for doc_id, weight in self.postings[token_index]:
+                    score = match_score * weight
+                    if score > token_scores.get(doc_id, 0):
+                        token_scores[doc_id] = score
+            
+            # Every query word has to match something in the document
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {doc_id: scores[doc_id] + score
+                          for doc_id, score in token_scores.items() if doc_id in scores}
+            if not scores:
+                return []
+        
+        name_index = self.fields.index('name')
+        ranked = sorted(scores.items(), key=lambda entry: (-entry[1], self.docs[entry[0]][name_index], entry[0]))
+        
+        results = []
+        for doc_id, score in ranked[:limit]:
+            result = dict(zip(self.fields, self.docs[doc_id]))
+            result['score'] = round(score, 3)
+            results.append(result)
+        return results
+
+
+if __name__ == "__main__":
+    import sys
+    
+    index = SearchIndex.load()
+    for result in index.search(' '.join(sys.argv[1:]) or 'bronze helm'):
+        print(f"{result['score']:5.2f}  {result['id']}")
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Eterspire API Data Generator - Pipeline Stages
+Models the pipeline as make-style stages with declared inputs and outputs:
+
+    scrape:  manual-download/*.html   -> all_gear_raw.ckpt
+    import:  all_gear_raw.ckpt        -> eterspire.db
+    export:  eterspire.db             -> output/*.json
+
+Each stage's fingerprint covers its input files' contents and its own code.
+A stage is skipped when the fingerprint matches the one recorded in
+.pipeline_cache.json and its outputs are still what it last wrote.
+"""
+
+import hashlib
+import json
+import os
+import time
+from checkpoint import CHECKPOINT_FILE
+
+CACHE_FILE = '.pipeline_cache.json'
+
+# Bump to invalidate every recorded fingerprint (e.g. when the cache layout changes)
+CACHE_VERSION = 1
+
+DB_FILE = 'eterspire.db'
+EXPORT_FILES = [
+    'output/gear_sets.json',
+    'output/items.json',
+    'output/weapons.json',
+    'output/armor.json',
+    'output/search_index.json',
+]
+
+
+def print_header(text):
+    """Print a formatted section header"""
+    print("\n" + "=" * 60)
+    print(f"  {text}")
+    print("=" * 60)
+
+
+def hash_file(path, digest=None):
+    """Hash a file's contents, or return a marker digest if it is missing"""
+    digest = digest or hashlib.sha256()
+    digest.update(path.encode('utf-8') + b'\0')
+    
+    if not os.path.exists(path):
+        digest.update(b'<missing>')
+        return digest
+    
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest
+
+
+class Stage:
+    """One pipeline step with declared inputs, outputs and code"""
+    
+    def __init__(self, name, title, inputs, outputs, code, run):
+        self.name = name
+        self.title = title
+        self.inputs = inputs      # callable returning the input paths
+        self.outputs = outputs    # output paths
+        self.code = code          # source files whose changes invalidate the stage
+        self.run = run            # callable returning an exit code
+    
+    def fingerprint(self):
+        """Fingerprint of this stage's code version and input contents"""
+        digest = hashlib.sha256(f"{self.name}:{CACHE_VERSION}".encode('utf-8'))
+        for path in self.code:
+            hash_file(path, digest)
+        for path in sorted(self.inputs()):
+            hash_file(path, digest)
+        return digest.hexdigest()
+    
+    def output_hashes(self):
+        return {path: hash_file(path).hexdigest() for path in self.outputs}
+
+
+def _html_inputs():
+    folder = 'manual-download'
+    if not os.path.exists(folder):
+        return []
+    return [os.path.join(folder, f) for f in os.listdir(folder) if f.endswith('.html')]
+
+
+def _db_inputs():
+    inputs = [DB_FILE]
+    # In WAL mode (watch daemon) recent writes may still live in the -wal file
+    if os.path.exists(DB_FILE + '-wal'):
+        inputs.append(DB_FILE + '-wal')
+    return inputs
+
+
+def _run_scrape():
+    from scraper import iter_scraped_files
+    from checkpoint import CheckpointWriter
+    
+    # Picks up after the last completed file if a previous scrape was interrupted
+    writer = CheckpointWriter(CHECKPOINT_FILE, resume=True)
+    if writer.resumed:
+        print(f"Resuming checkpoint: {len(writer.completed_files)} file(s), {writer.gear_set_count} gear set(s) already scraped")
+    
+    duplicates = {}
+    complete = False
+    try:
+        for filename, gear_sets in iter_scraped_files(skip_files=writer.completed_files, seen_names=writer.seen_names,
+                                                      duplicates=duplicates):
+            writer.add_file(filename, gear_sets, duplicates[filename])
+        complete = writer.gear_set_count > 0
+    finally:
+        writer.close(complete=complete)
+    
+    if not complete:
+        print("\n❌ ERROR: No data was scraped!")
+        return 1
+    
+    print(f"\n✅ Successfully scraped {writer.gear_set_count} gear set(s)")
+    print(f"   Raw data saved to: {CHECKPOINT_FILE}")
+    return 0
+
+
+def _run_import():
+    from checkpoint import read_gear_sets, is_complete
+    from database import init_database, replace_all_gear_data
+    
+    # A partial checkpoint would replace a good database with a truncated one
+    if not is_complete(CHECKPOINT_FILE):
+        print(f"\n❌ ERROR: {CHECKPOINT_FILE} is missing or incomplete (interrupted scrape?)")
+        print("   Run the scrape step again to finish it before importing")
+        return 1
+    
+    print("Initializing database...")
+    init_database()
+    
+    # Streams gear sets from the checkpoint instead of loading them all at once,
+    # replacing the previous import in one transaction
+    print(f"Importing gear sets from {CHECKPOINT_FILE}...")
+    sources = {}
+    duplicates = {}
+    replace_all_gear_data(read_gear_sets(CHECKPOINT_FILE, sources, duplicates), sources, duplicates)
+    
+    print("\n✅ Database import complete")
+    print(f"   Database file: {DB_FILE}")
+    return 0
+
+
+def _run_export():
+    from exporter import export_to_json
+    export_to_json()
+    return 0
+
+
+STAGES = [
+    Stage('scrape', "STEP 1: Scraping Wiki HTML Tables",
+          inputs=_html_inputs, outputs=[CHECKPOINT_FILE],
+          code=['scraper.py', 'checkpoint.py', 'stages.py'], run=_run_scrape),
+    Stage('import', "STEP 2: Importing to Database",
+          inputs=lambda: [CHECKPOINT_FILE], outputs=[DB_FILE],
+          code=['database.py', 'checkpoint.py', 'stages.py'], run=_run_import),
+    Stage('export', "STEP 3: Exporting JSON Files",
+          inputs=_db_inputs, outputs=EXPORT_FILES,
+          code=['exporter.py', 'search.py', 'stages.py'], run=_run_export),
+]
+
+STAGE_NAMES = [stage.name for stage in STAGES]
+
+
+def load_cache():
+    try:
+        with open(CACHE_FILE, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(cache):
+    with open(CACHE_FILE, 'w') as f:
+        json.dump(cache, f, indent=2)
+
+
+def run_stages(names=None, force=False):
+    """Run the given stages (default: all, in order), skipping up-to-date ones
+    
+    Returns (exit code, results) where results is a list of
+    (stage name, 'ran' | 'skipped' | 'failed', seconds) tuples; for skipped
+    stages, seconds is the time the last real run took (i.e. time saved).
+    """
+    names = names or STAGE_NAMES
+    cache = load_cache()
+    results = []
+    
+    for stage in STAGES:
+        if stage.name not in names:
+            continue
+        
+        print_header(stage.title)
+        
+        fingerprint = stage.fingerprint()
+        record = cache.get(stage.name)
+        
+        if (not force and record
+                and record.get('fingerprint') == fingerprint
+                and record.get('outputs') == stage.output_hashes()):
+            print(f"⏭️  Up to date, skipping (last run took {record['seconds']:.2f}s)")
+            results.append((stage.name, 'skipped', record['seconds']))
+            continue
+        
+        started = time.time()
+        exit_code = stage.run()
+        seconds = time.time() - started
+        
+        if exit_code:
+            results.append((stage.name, 'failed', seconds))
+            cache.pop(stage.name, None)
+            save_cache(cache)
+            return exit_code, results
+        
+        cache[stage.name] = {
+            'fingerprint': fingerprint,
+            'outputs': stage.output_hashes(),
+            'seconds': seconds,
+        }
+        save_cache(cache)
+        results.append((stage.name, 'ran', seconds))
+    
+    return 0, results
+
+
+def print_summary(results):
+    """Print which stages ran or were skipped, and the time saved by skipping"""
+    print("\n⏱️  Stages:")
+    for name, status, seconds in results:
+        icon = {'ran': '✓', 'skipped': '⏭️ ', 'failed': '❌'}[status]
+        print(f"   {icon} {name:<8} {status:<8} {seconds:6.2f}s")
+    
+    saved = sum(seconds for _, status, seconds in results if status == 'skipped')
+    if saved:
+        print(f"   Time saved by skipping: {saved:.2f}s")
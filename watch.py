@@ -4,22 +4,209 @@ Eterspire API Data Generator - File Watcher
 Automatically runs the data pipeline when files in manual-download folder change.
 """
 
+import hashlib
 import os
 import sys
+import threading
 import time
 from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
-from main import main as run_pipeline
+from watchdog.events import (
+    FileSystemEventHandler, FileCreatedEvent, FileModifiedEvent, FileDeletedEvent
+)
+from main import run_incremental
+
+
+class FileFingerprints:
+    """Detects real content changes with a cheap stat check and a hash fallback
+
+    A file is only re-hashed when its (size, mtime_ns) differs from the last
+    recorded fingerprint, and only reported as changed when its bytes differ.
+    Metadata-only touches and identical re-saves are filtered out.
+    
+    changed() does not record anything: the fingerprint it computed is kept
+    aside until commit() (once the change was rebuilt) or discard() (when the
+    rebuild failed, so the next event for the file is retried).
+    """
+    
+    def __init__(self):
+        self._entries = {}  # path -> (size, mtime_ns, digest)
+        self._staged = {}   # path -> fingerprint waiting for commit(), None to forget the path
+        self._lock = threading.Lock()
+    
+    def prime(self, folder):
+        """Record the current fingerprint of every file in folder without reporting changes"""
+        with os.scandir(folder) as entries:
+            paths = [entry.path for entry in entries if entry.is_file()]
+        for path in paths:
+            self.changed(path)
+        self.commit(paths)
+    
+    def changed(self, path):
+        """Return True if the file's content differs from its last recorded fingerprint"""
+        path = os.path.abspath(path)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            # Deletions always count, the file may still be in the database
+            self._stage(path, None)
+            return True
+        
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            return False
+        
+        try:
+            digest = self._hash_file(path)
+        except OSError:
+            # Replaced or unreadable mid-check (e.g. a browser "Save As"): let the
+            # rebuild decide, and hash it again next time
+            self._stage(path, None)
+            return True
+        
+        self._stage(path, (stat.st_size, stat.st_mtime_ns, digest))
+        return entry is None or entry[2] != digest
+    
+    def commit(self, paths):
+        """Record the fingerprints computed by changed() for these paths"""
+        with self._lock:
+            for path in paths:
+                path = os.path.abspath(path)
+                if path not in self._staged:
+                    continue
+                fingerprint = self._staged.pop(path)
+                if fingerprint is None:
+                    self._entries.pop(path, None)
+                else:
+                    self._entries[path] = fingerprint
+    
+    def discard(self, paths):
+        """Drop the fingerprints computed by changed() for these paths, keeping the old ones"""
+        with self._lock:
+            for path in paths:
+                self._staged.pop(os.path.abspath(path), None)
+    
+    def _stage(self, path, fingerprint):
+        with self._lock:
+            self._staged[path] = fingerprint
+    
+    @staticmethod
+    def _hash_file(path):
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+
+class ScandirPollingObserver(threading.Thread):
+    """Low-overhead polling observer for folders where inotify isn't available
+
+    Drop-in replacement for watchdog's Observer (schedule/start/stop/join).
+    Each poll is one os.scandir pass per watched folder comparing
+    (size, mtime_ns), so it stays cheap with thousands of files; changes are
+    dispatched to the handler as regular watchdog events.
+    """
+    
+    def __init__(self, interval=1.0):
+        super().__init__(name='scandir-polling-observer', daemon=True)
+        self.interval = interval
+        self._watches = []  # (handler, path, recursive, snapshot)
+        self._stopped = threading.Event()
+    
+    def schedule(self, event_handler, path, recursive=False):
+        """Watch path, sending events to event_handler"""
+        self._watches.append((event_handler, path, recursive, self._scan(path, recursive)))
+    
+    def stop(self):
+        self._stopped.set()
+    
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            for index, (handler, path, recursive, previous) in enumerate(self._watches):
+                current = self._scan(path, recursive)
+                self._dispatch(handler, previous, current)
+                self._watches[index] = (handler, path, recursive, current)
+    
+    @staticmethod
+    def _scan(path, recursive):
+        """Return {file path: (size, mtime_ns)} for the folder"""
+        snapshot = {}
+        folders = [path]
+        while folders:
+            try:
+                with os.scandir(folders.pop()) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_file():
+                                stat = entry.stat()
+                                snapshot[entry.path] = (stat.st_size, stat.st_mtime_ns)
+                            elif recursive and entry.is_dir():
+                                folders.append(entry.path)
+                        except FileNotFoundError:
+                            continue
+            except FileNotFoundError:
+                continue
+        return snapshot
+    
+    @staticmethod
+    def _dispatch(handler, previous, current):
+        for path, stat in current.items():
+            old_stat = previous.get(path)
+            if old_stat is None:
+                handler.dispatch(FileCreatedEvent(path))
+            elif old_stat != stat:
+                handler.dispatch(FileModifiedEvent(path))
+        
+        for path in previous.keys() - current.keys():
+            handler.dispatch(FileDeletedEvent(path))
 
 
 class ManualDownloadHandler(FileSystemEventHandler):
-    """Handles file system events in the manual-download folder"""
+    """Handles file system events in the manual-download folder
+
+    Events are coalesced into a pending set and handed to a dedicated worker
+    thread, so the watchdog observer thread never blocks on a pipeline run.
+    The worker waits until no new event has arrived for `debounce_seconds`
+    (trailing-edge debounce) before running, so the last save of a burst is
+    always picked up. Events that arrive during a run schedule exactly one
+    follow-up run.
+    
+    `rebuild` is called with the list of changed paths; it defaults to the
+    one-shot incremental pipeline (main.run_incremental). A non-zero integer
+    return value (an exit code, as from main.main) counts as a failed run.
+    """
     
-    def __init__(self, debounce_seconds=2):
+    def __init__(self, debounce_seconds=2, rebuild=None, fingerprints=None):
         super().__init__()
         self.debounce_seconds = debounce_seconds
+        self.rebuild = rebuild or run_incremental
+        self.fingerprints = fingerprints or FileFingerprints()
         self.last_modified = 0
         self.is_processing = False
+        
+        # Coalescing queue: filepath -> latest event type
+        self._pending = {}
+        self._first_event_at = None
+        self._condition = threading.Condition()
+        self._stopping = False
+        
+        self.stats = {
+            'events_received': 0,
+            'events_coalesced': 0,
+            'runs': 0,
+            'skipped_unchanged': 0,
+            'failed_runs': 0,
+            'last_run_seconds': None,
+            'total_run_seconds': 0.0,
+            'max_run_seconds': 0.0,
+            'last_event_to_output_seconds': None,
+        }
+        
+        self._worker = threading.Thread(
+            target=self._worker_loop, name='pipeline-worker', daemon=True
+        )
+        self._worker.start()
     
     def should_process(self, event):
         """Check if we should process this event"""
@@ -39,42 +226,159 @@ class ManualDownloadHandler(FileSystemEventHandler):
         return True
     
     def trigger_pipeline(self, event_type, filepath):
-        """Run the data pipeline with debouncing"""
-        current_time = time.time()
+        """Queue a pipeline run for this file (coalesced and debounced)"""
+        with self._condition:
+            self.stats['events_received'] += 1
+            if self._pending:
+                self.stats['events_coalesced'] += 1
+            else:
+                self._first_event_at = time.time()
+            
+            self._pending[filepath] = event_type
+            self.last_modified = time.time()
+            
+            if self.is_processing:
+                print(f"\n⏳ Pipeline already running, queued follow-up for {event_type} event...")
+            
+            self._condition.notify()
+    
+    def queue_depth(self):
+        """Number of distinct files waiting for the next run"""
+        with self._condition:
+            return len(self._pending)
+    
+    def get_stats(self):
+        """Return a snapshot of queue and run-latency statistics"""
+        with self._condition:
+            stats = dict(self.stats)
+            stats['queue_depth'] = len(self._pending)
+            stats['is_processing'] = self.is_processing
         
-        # Debounce: don't run if we just ran recently
-        if current_time - self.last_modified < self.debounce_seconds:
-            return
+        stats['avg_run_seconds'] = (
+            stats['total_run_seconds'] / stats['runs'] if stats['runs'] else None
+        )
+        return stats
+    
+    def stop(self, timeout=None):
+        """Stop the worker thread once the current run (if any) finishes"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        self._worker.join(timeout)
+    
+    def _next_batch(self):
+        """Block until a debounced batch of events is ready, or None on stop"""
+        with self._condition:
+            while True:
+                if self._stopping:
+                    return None
+                
+                if not self._pending:
+                    self._condition.wait()
+                    continue
+                
+                # Trailing edge: wait until the folder has been quiet long enough
+                remaining = self.last_modified + self.debounce_seconds - time.time()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+                
+                batch = self._pending
+                first_event_at = self._first_event_at
+                self._pending = {}
+                self._first_event_at = None
+                self.is_processing = True
+                return batch, first_event_at
+    
+    def _worker_loop(self):
+        """Run the pipeline for each debounced batch until stopped"""
+        while True:
+            next_batch = self._next_batch()
+            if next_batch is None:
+                return
+            
+            batch, first_event_at = next_batch
+            try:
+                self._run_batch(batch, first_event_at)
+            except Exception as e:
+                # Keep the worker alive; the files are retried on their next event
+                self.fingerprints.discard(batch)
+                with self._condition:
+                    self.stats['failed_runs'] += 1
+                print(f"\n❌ ERROR in watcher worker: {e}")
+                import traceback
+                traceback.print_exc()
+            finally:
+                with self._condition:
+                    self.is_processing = False
+    
+    def _run_batch(self, batch, first_event_at):
+        """Run the data pipeline once for a batch of changed files"""
+        # Drop files whose bytes did not actually change (touches, identical re-saves)
+        unchanged = [path for path in batch if not self.fingerprints.changed(path)]
+        self.fingerprints.commit(unchanged)
+        for path in unchanged:
+            del batch[path]
         
-        # Don't run if already processing
-        if self.is_processing:
-            print(f"\n⏳ Pipeline already running, ignoring {event_type} event...")
+        if unchanged:
+            with self._condition:
+                self.stats['skipped_unchanged'] += len(unchanged)
+        
+        if not batch:
+            names = ', '.join(sorted(os.path.basename(path) for path in unchanged))
+            print(f"\n💤 No content changes in: {names} (skipped)")
             return
         
-        self.last_modified = current_time
-        self.is_processing = True
+        filenames = ', '.join(sorted(os.path.basename(path) for path in batch))
+        event_types = ', '.join(sorted(set(batch.values())))
+        
+        print(f"\n{'=' * 60}")
+        print(f"🔔 DETECTED: {event_types.upper()} - {filenames}")
+        print(f"{'=' * 60}")
+        print(f"⚡ Auto-running pipeline...\n")
         
+        started = time.time()
         try:
-            filename = os.path.basename(filepath)
-            print(f"\n{'=' * 60}")
-            print(f"🔔 DETECTED: {event_type.upper()} - {filename}")
-            print(f"{'=' * 60}")
-            print(f"⚡ Auto-running pipeline...\n")
-            
-            # Run the pipeline
-            run_pipeline()
-            
-            print(f"\n{'=' * 60}")
-            print(f"✅ Pipeline completed for: {filename}")
-            print(f"{'=' * 60}")
-            print(f"\n👀 Watching for changes... (Press Ctrl+C to stop)")
-            
+            # Rebuild only what the changed files contribute
+            result = self.rebuild(list(batch))
+            succeeded = not (isinstance(result, int) and result)
+            if not succeeded:
+                print(f"\n❌ Pipeline failed with exit code {result}")
         except Exception as e:
+            succeeded = False
             print(f"\n❌ ERROR during pipeline execution: {e}")
             import traceback
             traceback.print_exc()
-        finally:
-            self.is_processing = False
+        
+        finished = time.time()
+        run_seconds = finished - started
+        
+        # Only remember the new content once it made it into the outputs
+        if succeeded:
+            self.fingerprints.commit(batch)
+        else:
+            self.fingerprints.discard(batch)
+        
+        with self._condition:
+            self.stats['runs'] += 1
+            if not succeeded:
+                self.stats['failed_runs'] += 1
+            self.stats['last_run_seconds'] = run_seconds
+            self.stats['total_run_seconds'] += run_seconds
+            self.stats['max_run_seconds'] = max(self.stats['max_run_seconds'], run_seconds)
+            self.stats['last_event_to_output_seconds'] = finished - first_event_at
+            queued = len(self._pending)
+        
+        if succeeded:
+            print(f"\n{'=' * 60}")
+            print(f"✅ Pipeline completed for: {filenames}")
+            print(f"   Run time: {run_seconds:.2f}s | Event to output: {finished - first_event_at:.2f}s | Queued: {queued}")
+            print(f"{'=' * 60}")
+        
+        if queued:
+            print(f"\n🔁 {queued} file(s) changed during the run, follow-up queued...")
+        else:
+            print(f"\n👀 Watching for changes... (Press Ctrl+C to stop)")
     
     def on_created(self, event):
         """Called when a file is created"""
@@ -85,10 +389,22 @@ class ManualDownloadHandler(FileSystemEventHandler):
         """Called when a file is modified"""
         if self.should_process(event):
             self.trigger_pipeline('modified', event.src_path)
+    
+    def on_deleted(self, event):
+        """Called when a file is deleted"""
+        if self.should_process(event):
+            self.trigger_pipeline('deleted', event.src_path)
 
 
-def watch_manual_download():
-    """Start watching the manual-download folder"""
+def watch_manual_download(daemon=False, socket_path=None, poll_interval=None):
+    """Start watching the manual-download folder
+    
+    With `daemon`, parsed data, the database connection and the export views
+    stay resident between events (see daemon.WarmState), optionally streaming
+    updates to subscribers on the Unix socket at `socket_path`. With
+    `poll_interval` (seconds), the folder is polled with ScandirPollingObserver
+    instead of using native file system notifications.
+    """
     
     watch_folder = 'manual-download'
     
@@ -108,9 +424,31 @@ def watch_manual_download():
     print("   (Press Ctrl+C to stop)")
     print("=" * 60 + "\n")
     
+    state = None
+    publisher = None
+    rebuild = None
+    if daemon:
+        from daemon import WarmState, UnixSocketPublisher
+        
+        print("🔥 Daemon mode: loading warm state...")
+        state = WarmState()
+        if socket_path:
+            publisher = UnixSocketPublisher(state, socket_path)
+            publisher.start()
+            print(f"📡 Publishing updates on: {socket_path}")
+        state.load()
+        rebuild = state.apply_changes
+        print("\n✅ Warm state loaded, waiting for file changes...\n")
+    
     # Create event handler and observer
-    event_handler = ManualDownloadHandler(debounce_seconds=2)
-    observer = Observer()
+    event_handler = ManualDownloadHandler(debounce_seconds=2, rebuild=rebuild)
+    event_handler.fingerprints.prime(watch_folder)
+    
+    if poll_interval:
+        print(f"🔁 Polling every {poll_interval}s (no native file notifications)\n")
+        observer = ScandirPollingObserver(interval=poll_interval)
+    else:
+        observer = Observer()
     observer.schedule(event_handler, watch_folder, recursive=False)
     observer.start()
     
@@ -122,12 +460,28 @@ def watch_manual_download():
         observer.stop()
     
     observer.join()
+    event_handler.stop()
+    if publisher:
+        publisher.stop()
+    if state:
+        state.close()
     print("✅ File watcher stopped\n")
 
 
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Watch manual-download and rebuild the API data on changes")
+    parser.add_argument('--daemon', action='store_true',
+                        help="keep parsed data, DB connection and export views resident between events")
+    parser.add_argument('--socket', metavar='PATH',
+                        help="with --daemon, stream updates as JSON lines on this Unix socket")
+    parser.add_argument('--poll', metavar='SECONDS', type=float, nargs='?', const=1.0,
+                        help="poll the folder instead of using native notifications (e.g. network mounts), default every 1s")
+    args = parser.parse_args()
+    
     try:
-        watch_manual_download()
+        watch_manual_download(daemon=args.daemon, socket_path=args.socket, poll_interval=args.poll)
     except Exception as e:
         print(f"\n❌ ERROR: {e}")
         import traceback